@@ -1 +1,2 @@
+from . import bot
 from . import stack
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""An asyncio driver for the bot's polling loop.
+
+PRAW is blocking, so every call into it is handed to a thread pool and awaited.  The inbox is polled on a fixed
+interval regardless of how long earlier mentions take: each mention is answered in its own task, at most
+maximum_concurrent_mentions at a time, and periodic jobs such as the heartbeat run as independent tasks.
+
+Errors answering a single mention are logged and the bot carries on, but fatal errors, such as failed authentication
+or an inbox that cannot be fetched maximum_inbox_failures times in a row, stop the bot and are raised from run(), so
+that a supervisor can restart it."""
+import asyncio
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from prawcore.exceptions import InsufficientScope, InvalidToken, OAuthException
+
+
+class BotCore:
+    maximum_concurrent_mentions = 4
+    # A poll may fetch the inbox before an answered mention is marked read; those remembered are not answered twice.
+    remembered_mentions = 1024
+    # A mention whose answer raises this many times is given up on rather than retried every poll.
+    maximum_attempts = 3
+    # Raised out of run() wherever they occur, as retrying cannot help.
+    fatal_errors = (OAuthException, InvalidToken, InsufficientScope)
+    maximum_inbox_failures = 5
+
+    def __init__(self, get_inbox, handle_mention, handle_inbox=None, poll_interval: float = 60, abandon_mention=None,
+                 prepare_mentions=None):
+        """:param get_inbox: Blocking callable returning an InboxSnapshot
+        :param handle_mention: Blocking callable answering a single mention from the snapshot
+        :param handle_inbox: Optional blocking callable given each snapshot, e.g. to answer private messages
+        :param poll_interval: Seconds between inbox polls
+        :param abandon_mention: Optional blocking callable given each mention that is given up on, e.g. to mark it
+        read
+        :param prepare_mentions: Optional blocking callable given the list of mentions a poll is about to dispatch,
+        e.g. to fetch what they need together; its result is passed to handle_mention as a second argument"""
+        self.get_inbox = get_inbox
+        self.handle_mention = handle_mention
+        self.handle_inbox = handle_inbox
+        self.poll_interval = poll_interval
+        self.abandon_mention = abandon_mention
+        self.prepare_mentions = prepare_mentions
+        self._periodic_jobs = []
+        # fullname -> task, so that a mention still being answered is not dispatched again by the next poll
+        self._in_flight = {}
+        self._answered = OrderedDict()
+        self._failures = {}
+        self._semaphore = None
+        self._executor = None
+        self._stopping = False
+        self._fatal = None
+        self._inbox_failures = 0
+
+    def __repr__(self):
+        return "<BotCore: {} mentions in flight>".format(len(self._in_flight))
+
+    def every(self, interval: float, job):
+        """Runs the blocking, no-argument job every interval seconds while the bot runs."""
+        self._periodic_jobs.append((interval, job))
+        return self
+
+    def stop(self):
+        """Asks a running bot to finish answering its mentions and return, instead of polling again."""
+        self._stopping = True
+
+    def run(self, long_lived=True):
+        """Polls until stop() is called, or exactly once if not long_lived, then returns once every mention found
+        has been answered.  Raises the first fatal error encountered, once mentions already started are answered."""
+        self._stopping = False
+        self._fatal = None
+        self._inbox_failures = 0
+        loop = asyncio.new_event_loop()
+        # Polls and periodic jobs get threads of their own, so they never queue behind slow mentions.
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.maximum_concurrent_mentions + 1 + len(self._periodic_jobs))
+        try:
+            loop.run_until_complete(self._run(long_lived))
+        finally:
+            self._executor.shutdown(wait=True)
+            loop.close()
+
+    async def _run(self, long_lived):
+        self._semaphore = asyncio.Semaphore(self.maximum_concurrent_mentions)
+        periodic_tasks = [asyncio.ensure_future(self._repeat(interval, job)) for interval, job in self._periodic_jobs]
+        try:
+            while True:
+                await self.poll()
+                if not long_lived or self._stopping:
+                    break
+                await asyncio.sleep(self.poll_interval)
+                if self._stopping:
+                    break
+        finally:
+            if self._in_flight:
+                await asyncio.wait(list(self._in_flight.values()))
+            for task in periodic_tasks:
+                task.cancel()
+            await asyncio.gather(*periodic_tasks, return_exceptions=True)
+        if self._fatal is not None:
+            raise self._fatal
+
+    def _fail(self, error):
+        """Stops the bot, to raise error from run() once mentions in flight are answered."""
+        if self._fatal is None:
+            self._fatal = error
+        self.stop()
+
+    async def _call(self, function, *args):
+        return await asyncio.get_event_loop().run_in_executor(self._executor, partial(function, *args))
+
+    async def poll(self):
+        """Fetches the inbox and starts a task for each mention not already being answered."""
+        try:
+            inbox = await self._call(self.get_inbox)
+        except self.fatal_errors:
+            raise
+        except Exception:
+            self._inbox_failures += 1
+            if self._inbox_failures >= self.maximum_inbox_failures:
+                logging.error("Could not fetch the inbox {} times in a row.".format(self._inbox_failures))
+                raise
+            logging.exception("Could not fetch the inbox; retrying next poll.")
+            return
+        self._inbox_failures = 0
+        logging.info("Username mentions in this pass: {}".format(len(inbox.mentions)))
+        dispatched = OrderedDict()
+        for mention in inbox.mentions:
+            key = getattr(mention, "fullname", id(mention))
+            if key not in self._in_flight and key not in self._answered:
+                dispatched[key] = mention
+        prepared = ()
+        if dispatched and self.prepare_mentions:
+            try:
+                prepared = (await self._call(self.prepare_mentions, list(dispatched.values())),)
+            except self.fatal_errors:
+                raise
+            except Exception:
+                logging.exception("Error preparing mentions; answering them unprepared.")
+                prepared = (None,)
+        for key, mention in dispatched.items():
+            self._in_flight[key] = asyncio.ensure_future(self._answer(key, mention, prepared))
+        if self.handle_inbox:
+            try:
+                await self._call(self.handle_inbox, inbox)
+            except self.fatal_errors:
+                raise
+            except Exception:
+                logging.exception("Error handling inbox.")
+
+    async def _answer(self, key, mention, prepared=()):
+        try:
+            async with self._semaphore:
+                await self._call(self.handle_mention, mention, *prepared)
+            self._remember(key)
+        except self.fatal_errors as e:
+            logging.exception("Fatal error answering mention {}.".format(key))
+            self._fail(e)
+        except Exception:
+            logging.exception("Error answering mention {}.".format(key))
+            self._failures[key] = self._failures.get(key, 0) + 1
+            if self._failures[key] >= self.maximum_attempts:
+                logging.error("Giving up on mention {} after {} attempts.".format(key, self._failures[key]))
+                self._remember(key)
+                if self.abandon_mention:
+                    try:
+                        await self._call(self.abandon_mention, mention)
+                    except self.fatal_errors as e:
+                        self._fail(e)
+                    except Exception:
+                        logging.exception("Error abandoning mention {}.".format(key))
+        finally:
+            del self._in_flight[key]
+
+    def _remember(self, key):
+        self._failures.pop(key, None)
+        self._answered[key] = True
+        if len(self._answered) > self.remembered_mentions:
+            self._answered.popitem(last=False)
+
+    async def _repeat(self, interval, job):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._call(job)
+            except self.fatal_errors as e:
+                logging.exception("Fatal error in periodic job {}.".format(getattr(job, "__name__", job)))
+                self._fail(e)
+                return
+            except Exception:
+                logging.exception("Error in periodic job {}.".format(getattr(job, "__name__", job)))
@@ -1,2 +1,4 @@
+from . import acknowledge
+from . import batch
 from . import context
 from . import endpoint
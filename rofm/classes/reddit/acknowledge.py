@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Marks inbox items read in batches, and only once their replies are on record.
+
+Each reply is written to the ReplyJournal as soon as it is posted.  Answered items are then handed to an
+AcknowledgementBuffer, which marks them read with one call per batch, at the end of a pass or once the buffer fills,
+and clears them from the journal.  If the bot dies between replying and marking read, the item comes back unread but
+the journal shows it was answered, so it is acknowledged rather than answered twice."""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .endpoint import Reddit
+from ..util.configuration import Config, Section, Subsection
+
+
+class ReplyJournal:
+    """Inbox items that have been replied to but not yet marked read, persisted in SQLite."""
+    _default = None
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS replies ("
+                                     " fullname TEXT PRIMARY KEY,"
+                                     " reply TEXT,"
+                                     " replied_at REAL NOT NULL)")
+
+    def __repr__(self):
+        return "<ReplyJournal at '{}'>".format(self.path)
+
+    @classmethod
+    def default(cls):
+        """The journal described by the loaded configuration, or None if no [journal] section has been loaded."""
+        if cls._default is None and Section.journal in Config.config:
+            journal_config = Config.get(Section.journal)
+            directory = journal_config.get(Subsection.directory)
+            os.makedirs(directory, exist_ok=True)
+            cls._default = cls(os.path.join(directory, journal_config.get(Subsection.filename)))
+        return cls._default
+
+    def record(self, fullname: str, reply: str = None):
+        """Records that fullname has been answered.  The record is committed before this returns."""
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO replies VALUES (?, ?, ?)", (fullname, reply, time.time()))
+
+    def has_replied(self, fullname: str) -> bool:
+        with self._lock:
+            row = self._connection.execute("SELECT 1 FROM replies WHERE fullname = ?", (fullname,)).fetchone()
+        return row is not None
+
+    def forget(self, fullnames):
+        """Clears items that have been marked read."""
+        with self._lock, self._connection:
+            self._connection.executemany("DELETE FROM replies WHERE fullname = ?", ((f,) for f in fullnames))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM replies").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+class AcknowledgementBuffer:
+    """Thread-safe.  Collects answered inbox items and marks them read batch_size at a time."""
+    batch_size = 100
+
+    def __init__(self, mark_read=None, journal: ReplyJournal = None, batch_size: int = None):
+        """:param mark_read: Callable marking a list of items read; defaults to Reddit.r.inbox.mark_read at each flush
+        :param journal: Where replies are recorded; items are cleared from it once marked read
+        :param batch_size: Items per mark_read call, and the number buffered before flushing on its own"""
+        self.mark_read = mark_read
+        self.journal = journal
+        if batch_size is not None:
+            self.batch_size = batch_size
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._items = []
+
+    @classmethod
+    def default(cls):
+        """A buffer using the configured journal and batch size, if a [journal] section has been loaded."""
+        journal = ReplyJournal.default()
+        if journal is None:
+            return cls()
+        return cls(journal=journal, batch_size=int(Config.get(Section.journal, Subsection.batch_size)))
+
+    def __repr__(self):
+        return "<AcknowledgementBuffer: {} items waiting, {} calls>".format(len(self._items), self.calls)
+
+    def __len__(self):
+        return len(self._items)
+
+    def record(self, item, reply=None):
+        """Journals the reply to item, without queueing item to be marked read.  Call as soon as the reply is posted.
+
+        :param reply: The reply posted, or the first of a chain of them"""
+        if self.journal is not None:
+            self.journal.record(item.fullname, getattr(reply, "fullname", None))
+
+    def replied(self, item, reply=None):
+        """Journals the reply to item, then queues item to be marked read."""
+        self.record(item, reply)
+        self.acknowledge(item)
+
+    def has_replied(self, item) -> bool:
+        """True if item was answered by an earlier pass that did not get as far as marking it read."""
+        return self.journal is not None and self.journal.has_replied(item.fullname)
+
+    def acknowledge(self, item):
+        """Queues item to be marked read, flushing if the buffer is full.  Call replied() instead for items answered
+        with a reply, so that the reply is on record before the item is marked read."""
+        with self._lock:
+            self._items.append(item)
+            full = len(self._items) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Marks every queued item read, batch_size per call.  Items in a batch that fails stay queued for the next
+        flush."""
+        with self._flush_lock:
+            with self._lock:
+                items, self._items = self._items, []
+            mark_read = self.mark_read or Reddit.r.inbox.mark_read
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                try:
+                    self.calls += 1
+                    mark_read(batch)
+                except Exception as e:
+                    logging.warning("Could not mark {} items read; retrying next flush: {}".format(len(batch), e))
+                    with self._lock:
+                        self._items[:0] = items[start:]
+                    return
+                if self.journal is not None:
+                    self.journal.forget(item.fullname for item in batch)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Fetches comments and submissions by fullname through Reddit's info endpoint, up to 100 per call.
+
+Callers first ask for everything they will need, each receiving a Future.  flush() then resolves all outstanding
+fullnames in as few calls as possible and fans each result back out to the futures waiting on it, so a mention
+linking to a dozen posts, or a pass over a dozen mentions, costs one call rather than a dozen."""
+import logging
+import re
+import threading
+from concurrent.futures import Future
+
+from .endpoint import Reddit
+
+# /comments/<submission id>[/<slug>[/<comment id>]]
+_comments_path_pattern = re.compile("/comments/([a-z0-9]+)(?:/[^/?#]*(?:/([a-z0-9]+))?)?", re.IGNORECASE)
+
+
+def fullname_from_link(href: str):
+    """The fullname of the comment or submission a Reddit link points to, or None if it points to neither."""
+    match = _comments_path_pattern.search(href)
+    if not match:
+        return None
+    submission_id, comment_id = match.groups()
+    return "t1_" + comment_id.lower() if comment_id else "t3_" + submission_id.lower()
+
+
+class InfoBatcher:
+    """Thread-safe.  Each fullname is fetched at most once; a thing Reddit does not return resolves to None."""
+    chunk_size = 100
+
+    def __init__(self, reddit=None):
+        """:param reddit: The praw.Reddit to fetch with; defaults to Reddit.r at the time of each flush."""
+        self.reddit = reddit
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._pending = []
+
+    def __repr__(self):
+        return "<InfoBatcher: {} things, {} pending, {} calls>".format(len(self._futures), len(self._pending),
+                                                                       self.calls)
+
+    def request(self, fullname: str) -> Future:
+        """A Future for the thing named, fetched by the next flush() if it has not been already."""
+        with self._lock:
+            if fullname not in self._futures:
+                self._futures[fullname] = Future()
+                self._pending.append(fullname)
+            return self._futures[fullname]
+
+    def request_link(self, href: str):
+        """As request(), for the thing a link points to.  Returns None if the link names no comment or submission."""
+        fullname = fullname_from_link(href)
+        return None if fullname is None else self.request(fullname)
+
+    def get(self, fullname: str):
+        """The thing named, flushing first if it is not yet fetched."""
+        future = self.request(fullname)
+        if not future.done():
+            self.flush()
+        return future.result()
+
+    def flush(self):
+        """Fetches every outstanding fullname, chunk_size per call, and resolves the futures waiting on them."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        reddit = self.reddit or Reddit.r
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start:start + self.chunk_size]
+            try:
+                self.calls += 1
+                found = {thing.fullname: thing for thing in reddit.info(fullnames=chunk)}
+            except Exception as e:
+                logging.debug("Could not fetch info for {} things: {}".format(len(chunk), e))
+                for fullname in chunk:
+                    self._futures[fullname].set_exception(e)
+                continue
+            for fullname in chunk:
+                self._futures[fullname].set_result(found.get(fullname))
@@ -1,24 +1,34 @@
 #!/usr/bin/env python3
 import logging
+import re
+from collections import namedtuple
 
 import praw
 from praw.models.reddit.comment import Comment
 from praw.models.reddit.message import Message
 
 from .context import MentionContext
+from ..tables.cache import cached_parse
+from ..tables.table import parse_tables
 from ..util import configuration
 
 
 # from typing import List
 
+# One pass's view of the unread inbox, fetched once and split locally.
+InboxSnapshot = namedtuple("InboxSnapshot", ["unread", "mentions", "private_messages"])
+
 
 def comment_contains_username(comment: Comment):
-    return Reddit.r.user.me().name in comment.body
+    return bool(Reddit.get_username_pattern().search(comment.body))
 
 
 class Reddit:
     # Static PRAW.reddit reference.  Define type for IDE integration.
     r = praw.Reddit(client_id="void", user_agent="void", client_secret="void")
+    # The bot's own name, resolved once per login rather than once per inbox item
+    username = None
+    _username_pattern = None
 
     def __init__(self):
         raise NotImplementedError("The reddit class is not intended for instantiation.")
@@ -26,10 +36,23 @@ class Reddit:
     @classmethod
     def login(cls):
         cls.r = praw.Reddit(site_name="roll_one")
+        cls.username = None
+        cls._username_pattern = None
+        cls.get_username_pattern()
 
     @classmethod
     def logout(cls):
         del cls.r
+        cls.username = None
+        cls._username_pattern = None
+
+    @classmethod
+    def get_username_pattern(cls):
+        """Precompiled, case-insensitive pattern matching the bot's username, resolved on first use after login."""
+        if cls._username_pattern is None:
+            cls.username = cls.r.user.me().name
+            cls._username_pattern = re.compile(re.escape(cls.username), re.IGNORECASE)
+        return cls._username_pattern
 
     @staticmethod
     def beep_boop():
@@ -52,17 +75,26 @@ class Reddit:
         return list(cls.r.inbox.unread())
 
     @classmethod
-    def get_mentions(cls) -> "user-mention generator":
-        return [msg for msg in cls.r.inbox.unread() if isinstance(msg, Comment) and comment_contains_username(msg)]
+    def get_inbox_snapshot(cls) -> InboxSnapshot:
+        """Fetches the unread inbox once and splits it into username mentions and private messages."""
+        unread = cls.get_unread()
+        pattern = cls.get_username_pattern()
+        mentions = [msg for msg in unread if isinstance(msg, Comment) and pattern.search(msg.body)]
+        private_messages = [msg for msg in unread if isinstance(msg, Message)]
+        return InboxSnapshot(unread, mentions, private_messages)
+
+    @classmethod
+    def get_mentions(cls, snapshot: InboxSnapshot = None) -> "user-mention generator":
+        return (snapshot or cls.get_inbox_snapshot()).mentions
 
     @classmethod
-    def get_private_messages(cls):
+    def get_private_messages(cls, snapshot: InboxSnapshot = None):
         # def get_private_messages(cls) -> List[Message]:
-        return [msg for msg in cls.r.inbox.unread() if isinstance(msg, Message)]
+        return (snapshot or cls.get_inbox_snapshot()).private_messages
 
     @classmethod
     def get_tables_from_mention(cls, mention):
-        pass
+        return cached_parse(mention, lambda: parse_tables(mention.body), "enumerated")
 
     @classmethod
     def get_mention_context(cls, mention) -> MentionContext:
@@ -75,7 +107,7 @@ class Reddit:
             logging.debug("Attempting to follow href to comment: {}".format(href))
             return cls.r.comment(href)
         except praw.exceptions.PRAWException:
-            logging.debug("Comment failed.  Attempting to follow href to submission: {]".format(href))
+            logging.debug("Comment failed.  Attempting to follow href to submission: {}".format(href))
             return cls.r.submission(None, href)
 
 
@@ -1,2 +1,5 @@
+from . import distribution
+from . import expression
 from . import keep
+from . import rng
 from . import roll
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Exact probability distributions for Rolls and Throws.
+
+A Distribution stores the number of equally likely outcomes producing each value, together with the total number
+of outcomes.  Keeping integer counts (rather than floats or Fractions) keeps every operation exact and cheap;
+probabilities are only turned into Fractions when asked for."""
+import operator
+from bisect import bisect_right
+from collections import defaultdict
+from fractions import Fraction
+from functools import lru_cache
+from itertools import accumulate, chain, repeat
+
+from .keep import Keep
+
+ROLL_DISTRIBUTION_CACHE_SIZE = 512
+# Distributions needing more than about this many big-integer operations are refused rather than started.
+MAXIMUM_WORK = 2 * 10 ** 7
+
+
+class Distribution:
+    __slots__ = ("counts", "total", "_values", "_cumulative")
+
+    def __init__(self, counts: dict, total: int):
+        """:param counts: Mapping of value to the number of outcomes producing that value
+        :param total: Total number of outcomes, i.e., the sum of counts"""
+        self.counts = {value: count for value, count in counts.items() if count}
+        self.total = total
+        self._values = None
+        self._cumulative = None
+
+    @classmethod
+    def constant(cls, value: int):
+        return cls({value: 1}, 1)
+
+    @classmethod
+    def coerce(cls, other):
+        return other if isinstance(other, Distribution) else cls.constant(other)
+
+    def __repr__(self):
+        return "<Distribution over [{}, {}] with {} outcomes>".format(self.min(), self.max(), self.total)
+
+    def __eq__(self, other):
+        if not isinstance(other, Distribution):
+            return NotImplemented
+        return self.counts == other.counts and self.total == other.total
+
+    def __hash__(self):
+        return hash((self.total, frozenset(self.counts.items())))
+
+    def min(self):
+        return self.support()[0]
+
+    def max(self):
+        return self.support()[-1]
+
+    def support(self):
+        """Sorted list of values with nonzero probability."""
+        if self._values is None:
+            self._values = sorted(self.counts)
+        return self._values
+
+    def pmf(self) -> dict:
+        """Mapping of each possible value to its exact probability."""
+        return {value: Fraction(self.counts[value], self.total) for value in self.support()}
+
+    def probability(self, value) -> Fraction:
+        return Fraction(self.counts.get(value, 0), self.total)
+
+    def cdf(self, value) -> Fraction:
+        """Probability that the outcome is at most the given value."""
+        if self._cumulative is None:
+            self._cumulative = list(accumulate(self.counts[v] for v in self.support()))
+        index = bisect_right(self.support(), value)
+        return Fraction(self._cumulative[index - 1] if index else 0, self.total)
+
+    def mean(self) -> Fraction:
+        return Fraction(sum(value * count for value, count in self.counts.items()), self.total)
+
+    def variance(self) -> Fraction:
+        mean = self.mean()
+        return Fraction(sum(value * value * count for value, count in self.counts.items()), self.total) - mean * mean
+
+    def _combine(self, other, operation):
+        other = Distribution.coerce(other)
+        _check_work(len(self.counts) * len(other.counts), "Combining distributions of {} and {} values".format(
+            len(self.counts), len(other.counts)))
+        counts = defaultdict(int)
+        for left, left_count in self.counts.items():
+            for right, right_count in other.counts.items():
+                counts[operation(left, right)] += left_count * right_count
+        return Distribution(counts, self.total * other.total)
+
+    def __add__(self, other):
+        return self._combine(other, operator.add)
+
+    def __sub__(self, other):
+        return self._combine(other, operator.sub)
+
+    def __mul__(self, other):
+        return self._combine(other, operator.mul)
+
+    def __floordiv__(self, other):
+        other = Distribution.coerce(other)
+        if 0 in other.counts:
+            raise ZeroDivisionError("Divisor {!r} may be zero.".format(other))
+        return self._combine(other, operator.floordiv)
+
+    def __radd__(self, other):
+        return Distribution.coerce(other) + self
+
+    def __rsub__(self, other):
+        return Distribution.coerce(other) - self
+
+    def __rmul__(self, other):
+        return Distribution.coerce(other) * self
+
+    def __rfloordiv__(self, other):
+        return Distribution.coerce(other) // self
+
+    def __neg__(self):
+        return Distribution({-value: count for value, count in self.counts.items()}, self.total)
+
+
+@lru_cache(maxsize=ROLL_DISTRIBUTION_CACHE_SIZE)
+def roll_distribution(n: int, k: int, keep: Keep, keep_count: int) -> Distribution:
+    """Exact distribution of the kept sum of n k-sided dice.
+
+    The arguments are the normalized form of a roll string, e.g. '4d6^3' -> (4, 6, Keep.TOP, 3),
+    so results are memoized per distinct roll.  Raises TypeError, before doing any of the work, for rolls whose
+    distribution would take more than MAXIMUM_WORK operations."""
+    if keep == Keep.ALL or keep_count == n:
+        _check_work(n * (n - 1) // 2 * k, "The distribution of {}d{}".format(n, k))
+        return _sum_of_dice(n, k)
+    _check_work(keep_count * (keep_count - 1) // 2 * k * (k - 1) // 2 + k * keep_count * keep_count,
+                "The distribution of {}d{}{}{}".format(n, k, keep.to_char(), keep_count))
+    return _sum_of_kept_dice(n, k, keep_count, keep == Keep.TOP)
+
+
+def _check_work(work, description):
+    if work > MAXIMUM_WORK:
+        raise TypeError("{} is too costly to compute exactly.".format(description))
+
+
+def _sum_of_dice(n, k):
+    """Repeated convolution with a single die, where each convolution is a windowed prefix sum."""
+    counts = [1]
+    for _ in range(n):
+        counts = _convolve_with_die(counts, k)
+    return Distribution({n + offset: count for offset, count in enumerate(counts)}, k ** n)
+
+
+def _convolve_with_die(counts, k):
+    """Counts of a sum plus one more k-sided die, both offset so that their least value has index 0."""
+    prefix = list(accumulate(chain(counts, repeat(0, k - 1))))
+    return list(map(operator.sub, prefix, chain(repeat(0, k), prefix)))
+
+
+def _sum_of_kept_dice(n, k, keep_count, top):
+    """Exact distribution of the best keep_count of n dice, by conditioning on the threshold face.
+
+    Every outcome has exactly one threshold face t, shown by the keep_count-th most preferred die.  Some a <
+    keep_count dice show faces preferred to t, and at least keep_count - a of the rest show t.  Given t and a, the
+    preferred dice are uniform over the faces preferred to t and the rest contribute only a number of ways.  Measuring
+    each preferred die from t, the kept sum is keep_count * t plus the sum of those a offsets, so each threshold is a
+    polynomial in a single offset die, evaluated by Horner's rule with one windowed prefix sum per step."""
+    binomials = _pascal(n)
+    result = defaultdict(int)
+    for t in range(1, k + 1):
+        preferred = k - t if top else t - 1
+        less_preferred = k - 1 - preferred
+        # ways[a]: which a dice are preferred, then at least keep_count - a of the others show t, the rest less
+        ways = []
+        for a in range(keep_count):
+            free = n - a
+            short = sum(binomials[free][b] * less_preferred ** (free - b) for b in range(keep_count - a))
+            ways.append(binomials[n][a] * ((less_preferred + 1) ** free - short))
+        base = keep_count * t
+        if not preferred:
+            result[base] += ways[0]
+            continue
+
+        # Offsets run 1..preferred above t when keeping the top, or -preferred..-1 below it when keeping the bottom,
+        #  so the constant term added at each step is the first coefficient or the last, respectively.
+        polynomial = [ways[-1]]
+        for a in range(keep_count - 2, -1, -1):
+            polynomial = _convolve_with_die(polynomial, preferred)
+            if top:
+                polynomial.insert(0, ways[a])
+            else:
+                polynomial.append(ways[a])
+        lowest = base if top else base - len(polynomial) + 1
+        for offset, count in enumerate(polynomial):
+            result[lowest + offset] += count
+    return Distribution(result, k ** n)
+
+
+def _pascal(n):
+    rows = [[1]]
+    for i in range(1, n + 1):
+        previous = rows[-1]
+        rows.append([1] + [previous[j - 1] + previous[j] for j in range(1, i)] + [1])
+    return rows
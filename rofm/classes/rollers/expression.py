@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Small arithmetic expression trees whose leaves are constants or roll slots.
+
+A Throw string is parsed once into one of these trees.  Every roll in the
+string becomes a Slot referencing its position, so the same tree can be
+evaluated against roll values, distributions, batches of values, and so on.
+
+bounds() evaluates a tree with interval arithmetic, given a (low, high)
+interval for each slot.  Since every slot appears exactly once, the
+intervals of the operands of any operation are independent, and the
+extremes of +, -, * and integer division are found among the end points of
+those intervals."""
+import operator
+from itertools import product
+
+
+class Constant:
+    __slots__ = ("value",)
+
+    def __init__(self, value: int):
+        self.value = value
+
+    def __repr__(self):
+        return "Constant({})".format(self.value)
+
+    def evaluate(self, slots):
+        return self.value
+
+    def bounds(self, slot_bounds):
+        return self.value, self.value
+
+
+class Slot:
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+    def __repr__(self):
+        return "Slot({})".format(self.index)
+
+    def evaluate(self, slots):
+        return slots[self.index]
+
+    def bounds(self, slot_bounds):
+        return slot_bounds[self.index]
+
+
+class Negate:
+    __slots__ = ("operand",)
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def __repr__(self):
+        return "Negate({!r})".format(self.operand)
+
+    def evaluate(self, slots):
+        return -self.operand.evaluate(slots)
+
+    def bounds(self, slot_bounds):
+        low, high = self.operand.bounds(slot_bounds)
+        return -high, -low
+
+
+class BinaryOperation:
+    # Division is integer division, as documented in the README.
+    OPERATIONS = {'+': operator.add,
+                  '-': operator.sub,
+                  '*': operator.mul,
+                  '/': operator.floordiv}
+
+    __slots__ = ("symbol", "left", "right", "_operation")
+
+    def __init__(self, symbol: str, left, right):
+        self.symbol = symbol
+        self.left = left
+        self.right = right
+        self._operation = self.OPERATIONS[symbol]
+
+    def __repr__(self):
+        return "BinaryOperation('{}', {!r}, {!r})".format(self.symbol, self.left, self.right)
+
+    def evaluate(self, slots):
+        return self._operation(self.left.evaluate(slots), self.right.evaluate(slots))
+
+    def bounds(self, slot_bounds):
+        left_low, left_high = self.left.bounds(slot_bounds)
+        right_low, right_high = self.right.bounds(slot_bounds)
+        if self.symbol == '+':
+            return left_low + right_low, left_high + right_high
+        if self.symbol == '-':
+            return left_low - right_high, left_high - right_low
+
+        right_end_points = {right_low, right_high}
+        if self.symbol == '/':
+            if right_low == right_high == 0:
+                raise ZeroDivisionError("Divisor is always zero.")
+            # A divisor that may be zero contributes its nonzero values nearest to zero instead.
+            #  These are only attained when the divisor can actually be -1 or 1, so the bounds may be loose there.
+            if right_low <= 0 <= right_high:
+                right_end_points.discard(0)
+                right_end_points.update(v for v in (-1, 1) if right_low <= v <= right_high)
+        candidates = [self._operation(a, b) for a, b in product((left_low, left_high), right_end_points)]
+        return min(candidates), max(candidates)
+
+
+def largest_magnitude(tree, slot_bounds) -> int:
+    """The largest absolute value that tree, or any expression within it, can take given bounds for each slot."""
+    low, high = tree.bounds(slot_bounds)
+    largest = max(abs(low), abs(high))
+    for child in (getattr(tree, name, None) for name in ("operand", "left", "right")):
+        if child is not None:
+            largest = max(largest, largest_magnitude(child, slot_bounds))
+    return largest
+
+
+class ExpressionParser:
+    """Recursive descent over a list of tokens, each a (kind, value) tuple.
+
+    Token kinds are 'roll' (value is the slot index), 'number' (value is an int) and 'op' (value is one of
+    '+-*/()').  Precedence follows Python's: unary signs bind tighter than * and /, which bind tighter than + and -.
+    """
+
+    def __init__(self, tokens, source: str):
+        self.tokens = tokens
+        self.source = source
+        self.position = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise TypeError("Throw input string '{}' contains no expression.".format(self.source))
+        tree = self._sum()
+        if self.position != len(self.tokens):
+            self._fail()
+        return tree
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _advance(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _fail(self):
+        raise TypeError("Throw input string '{}' is not a well-formed expression.".format(self.source))
+
+    def _sum(self):
+        tree = self._product()
+        while self._peek() in (('op', '+'), ('op', '-')):
+            _, symbol = self._advance()
+            tree = BinaryOperation(symbol, tree, self._product())
+        return tree
+
+    def _product(self):
+        tree = self._unary()
+        while self._peek() in (('op', '*'), ('op', '/')):
+            _, symbol = self._advance()
+            tree = BinaryOperation(symbol, tree, self._unary())
+        return tree
+
+    def _unary(self):
+        # A run of signs is read in a loop and collapses to at most one Negate, so long runs cannot recurse deeply.
+        negative = False
+        while self._peek() in (('op', '-'), ('op', '+')):
+            _, symbol = self._advance()
+            negative ^= symbol == '-'
+        tree = self._atom()
+        return Negate(tree) if negative else tree
+
+    def _atom(self):
+        kind, value = self._advance()
+        if kind == 'roll':
+            return Slot(value)
+        if kind == 'number':
+            return Constant(value)
+        if (kind, value) == ('op', '('):
+            tree = self._sum()
+            if self._advance() != ('op', ')'):
+                self._fail()
+            return tree
+        self._fail()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Independent random streams for rolling dice.
+
+Each thread (and each process) draws from its own RandomStream, spawned from a common SeedSequence, so no
+generator state is shared between concurrent rolls.  A stream can be swapped for a seeded one for the duration
+of a request, making that request's rolls reproducible:
+
+    with seeded(1234):
+        Roll("4d6^3")
+"""
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class RandomStream:
+    """A NumPy PCG64 Generator whose integers are drawn in bulk.
+
+    Values for each die size are drawn buffer_size at a time and handed out from that buffer, so that a single
+    die costs a list slice rather than a call into the generator."""
+    buffer_size = 1024
+    maximum_buffered_die_sizes = 32
+
+    def __init__(self, seed_sequence: np.random.SeedSequence):
+        self.seed_sequence = seed_sequence
+        self.generator = np.random.Generator(np.random.PCG64(seed_sequence))
+        self.pid = os.getpid()
+        # die size -> (buffered values, position of the next unused value)
+        self._buffers = OrderedDict()
+
+    @classmethod
+    def from_seed(cls, seed):
+        return cls(np.random.SeedSequence(seed))
+
+    def __repr__(self):
+        return "<RandomStream {}>".format(self.seed_sequence.entropy)
+
+    def spawn(self, count: int) -> list:
+        """Independent child streams, e.g. one per worker."""
+        return [RandomStream(child) for child in self.seed_sequence.spawn(count)]
+
+    def randint(self, a: int, b: int) -> int:
+        """Random integer in [a, b], including both end points."""
+        return a - 1 + self.dice(1, b - a + 1)[0]
+
+    def dice(self, n: int, k: int) -> list:
+        """n random integers in [1, k]."""
+        if n >= self.buffer_size:
+            return self.generator.integers(1, k, size=n, endpoint=True).tolist()
+
+        values, position = self._buffers.pop(k, ((), 0))
+        if position + n > len(values):
+            values = list(values[position:]) + self.generator.integers(1, k, size=self.buffer_size,
+                                                                         endpoint=True).tolist()
+            position = 0
+        self._buffers[k] = (values, position + n)
+        if len(self._buffers) > self.maximum_buffered_die_sizes:
+            self._buffers.popitem(last=False)
+        return values[position:position + n]
+
+
+_root_lock = threading.Lock()
+_root_seed_sequence = np.random.SeedSequence()
+_root_pid = os.getpid()
+_local = threading.local()
+
+
+def _spawn_seed_sequence():
+    global _root_seed_sequence, _root_pid
+    with _root_lock:
+        if _root_pid != os.getpid():
+            # A forked child inherits the parent's root; draw fresh entropy so siblings do not share streams.
+            _root_seed_sequence = np.random.SeedSequence()
+            _root_pid = os.getpid()
+        return _root_seed_sequence.spawn(1)[0]
+
+
+def get_stream() -> RandomStream:
+    """The calling thread's stream, created on first use."""
+    stream = getattr(_local, "stream", None)
+    if stream is None or stream.pid != os.getpid():
+        stream = _local.stream = RandomStream(_spawn_seed_sequence())
+    return stream
+
+
+@contextmanager
+def use_stream(stream: RandomStream):
+    """Rolls made by the calling thread inside this block draw from the given stream."""
+    previous = getattr(_local, "stream", None)
+    _local.stream = stream
+    try:
+        yield stream
+    finally:
+        _local.stream = previous
+
+
+def seeded(seed):
+    """Rolls made by the calling thread inside this block are reproducible from the given seed."""
+    return use_stream(RandomStream.from_seed(seed))
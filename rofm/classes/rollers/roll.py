@@ -1,38 +1,219 @@
 #!/usr/bin/env python3
-import random
+import heapq
 import re
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain, repeat
 
+import numpy as np
+
+from .distribution import Distribution, roll_distribution
+from .expression import ExpressionParser, largest_magnitude
 from .keep import Keep
+from .rng import RandomStream, get_stream, use_stream
 
 ROLL_REGEX_STR = r"(\d+)?[dD](\d+)(?:([v^])(\d+))?"
 ROLL_REGEX = re.compile(ROLL_REGEX_STR)
 STARTS_WITH_ROLL_REGEX = re.compile(r"^" + ROLL_REGEX_STR)
 
+ROLL_SPEC_CACHE_SIZE = 1024
+THROW_SPEC_CACHE_SIZE = 512
+THROW_DISTRIBUTION_CACHE_SIZE = 512
+THROW_BOUNDS_CACHE_SIZE = 512
+# Batches are evaluated on int64 arrays only when no part of the expression can leave this range.
+INT64_MAXIMUM = np.iinfo(np.int64).max
+
+RollBatch = namedtuple("RollBatch", ["dice", "values"])
+ThrowBatch = namedtuple("ThrowBatch", ["rolls", "values"])
+
+
+class _ImmutableSpec:
+    """Base for interned, read-only parse results.  Attributes are assigned once, in __init__."""
+    __slots__ = ()
+
+    def __setattr__(self, key, value):
+        raise AttributeError("{} is immutable.".format(type(self).__name__))
+
+    def __delattr__(self, item):
+        raise AttributeError("{} is immutable.".format(type(self).__name__))
+
+
+class RollSpec(_ImmutableSpec):
+    """Parsed and validated form of a roll string, i.e. 4d6^3 -> n=4, k=6, keep=Keep.TOP, keep_count=3
+
+    Obtain instances with RollSpec.from_string, which parses each distinct string once but checks the dice limits,
+    which may change at runtime, every time."""
+    __slots__ = ("n", "k", "keep", "keep_count")
+
+    def __init__(self, n: int, k: int, keep: Keep, keep_count: int):
+        object.__setattr__(self, "n", n)
+        object.__setattr__(self, "k", k)
+        object.__setattr__(self, "keep", keep)
+        object.__setattr__(self, "keep_count", keep_count)
+
+    def __repr__(self):
+        return "RollSpec('{}')".format(self.normalized())
+
+    def __reduce__(self):
+        return RollSpec.from_string, (self.normalized(),)
+
+    def __eq__(self, other):
+        if not isinstance(other, RollSpec):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def _key(self):
+        return self.n, self.k, self.keep, self.keep_count
+
+    def normalized(self) -> str:
+        """Canonical roll string, e.g. both 'd20' and '1d20' normalize to '1d20'."""
+        if self.keep == Keep.ALL:
+            return "{}d{}".format(self.n, self.k)
+        return "{}d{}{}{}".format(self.n, self.k, self.keep.to_char(), self.keep_count)
+
+    @staticmethod
+    def from_string(s: str) -> "RollSpec":
+        spec = _parse_roll_spec(s)
+        spec.check_limits()
+        return spec
+
+    def check_limits(self):
+        if not 0 < self.n <= Roll.maximum_dice:
+            raise TypeError("Number of dice [{}] is not between 0 and maximum dice limit [{}]".format(
+                self.n, Roll.maximum_dice))
+        if not 0 < self.k <= Roll.maximum_die_size:
+            raise TypeError("Die size [{}] is not between 0 and maximum die size [{}]".format(
+                self.k, Roll.maximum_die_size))
+
+
+@lru_cache(maxsize=ROLL_SPEC_CACHE_SIZE)
+def _parse_roll_spec(s: str) -> RollSpec:
+    """Parses s without regard to the dice limits, so that the result stays valid if they change."""
+    match = ROLL_REGEX.match(s)
+    if not match:
+        raise TypeError("Roll string '{}' is not a valid roll.".format(s))
+
+    n = int(match.group(1)) if match.group(1) is not None else 1
+    k = int(match.group(2))
+    drop = match.group(3)
+    keep_str = match.group(4)
+    keep = drop and Keep.from_char(drop) or Keep.ALL
+    keep_count = n if not drop else int(keep_str)
+
+    if not 0 < keep_count <= n:
+        raise TypeError("Roll string '{}' would keep an invalid number of dice.".format(s))
+    return _intern_roll_spec(n, k, keep, keep_count)
+
+
+@lru_cache(maxsize=ROLL_SPEC_CACHE_SIZE)
+def _intern_roll_spec(n, k, keep, keep_count):
+    return RollSpec(n, k, keep, keep_count)
+
 
 class Roll(list):
-    """Wrapped list of values rolled, given a roll string, i.e. 5d4 or 4d6^3"""
+    """Wrapped list of values rolled, given a roll string, i.e. 5d4 or 4d6^3
+
+    The parsed roll is held in self.spec, which is shared between all Rolls of the same string.
+    Dice are kept in the order rolled unless sort_by is given; display sorts a copy when rendered.
+
+    Large pools that keep every die only draw how many times each face came up.  Individual dice are materialized,
+    in increasing order, the first time the list itself is read or changed through any list method or operator."""
 
     maximum_dice = 100
     maximum_die_size = 1000
+    # Kept dice are found by selection rather than sorting:  counting faces when the die is no larger than the pool,
+    #  or a heap when at most 1 / heap_selection_ratio of the dice are kept.
+    heap_selection_ratio = 8
+    # Pools of at least this many dice keeping every die are sampled as face counts.
+    count_sampling_threshold = 1000
+    # Face counts still to be materialized; also the state of a Roll being rebuilt by copy or pickle.
+    _face_counts = None
 
     def __init__(self, s: str, sort_by=None):
         self.original_string = s
-        match = ROLL_REGEX.match(s)
+        self.spec = RollSpec.from_string(s)
+        self._sort_by = sort_by
+        self._roll()
 
-        self.n = int(match.group(1)) if match.group(1) is not None else 1
-        self.k = int(match.group(2))
-        drop = match.group(3)
-        keep_str = match.group(4)
-        self.keep = drop and Keep.from_char(drop) or Keep.ALL
-        self.keep_count = self.n if not drop else int(keep_str)
+    @property
+    def n(self):
+        return self.spec.n
 
-        self._validate()
+    @property
+    def k(self):
+        return self.spec.k
 
-        super().__init__(random.randint(1, self.k) for _ in range(self.n))
-        self.sort(key=sort_by)
+    @property
+    def keep(self):
+        return self.spec.keep
+
+    @property
+    def keep_count(self):
+        return self.spec.keep_count
 
     def reroll(self):
-        super().__init__(random.randint(1, self.k) for _ in range(self.n))
+        self._roll()
+
+    def _roll(self):
+        self._value = None
+        self._face_counts = None
+        if self.keep == Keep.ALL and self.n >= self.count_sampling_threshold and self._sort_by is None:
+            super().__init__()
+            self._face_counts = get_stream().generator.multinomial(self.n, [1 / self.k] * self.k).tolist()
+            return
+        super().__init__(get_stream().dice(self.n, self.k))
+        if self._sort_by is not None:
+            self.sort(key=self._sort_by)
+
+    def _materialize(self):
+        if self._face_counts is not None:
+            face_counts, self._face_counts = self._face_counts, None
+            super().extend(chain.from_iterable(repeat(face, count) for face, count in enumerate(face_counts, 1)))
+
+    def __len__(self):
+        return self.n if self._face_counts is not None else super().__len__()
+
+    def __iter__(self):
+        self._materialize()
+        return super().__iter__()
+
+    def __reversed__(self):
+        self._materialize()
+        return super().__reversed__()
+
+    def __getitem__(self, item):
+        self._materialize()
+        return super().__getitem__(item)
+
+    def __radd__(self, other):
+        # list has no __radd__, so without this list + Roll would concatenate the unmaterialized storage.
+        if not isinstance(other, list):
+            return NotImplemented
+        self._materialize()
+        return list(other) + list(self)
+
+    def __reduce_ex__(self, protocol):
+        self._materialize()
+        return super().__reduce_ex__(protocol)
+
+    def roll_many(self, count: int) -> RollBatch:
+        """Rolls this roll count times at once, without affecting this instance's dice.
+
+        Returns a RollBatch whose dice are a (count, n) integer array, in the order rolled,
+        and whose values are the kept sum of each row."""
+        dice = get_stream().generator.integers(1, self.k, size=(count, self.n), endpoint=True)
+        if self.keep == Keep.ALL or self.keep_count == self.n:
+            return RollBatch(dice, dice.sum(axis=1))
+        if self.keep == Keep.TOP:
+            split = self.n - self.keep_count
+            kept = np.partition(dice, split, axis=1)[:, split:]
+        else:
+            kept = np.partition(dice, self.keep_count - 1, axis=1)[:, :self.keep_count]
+        return RollBatch(dice, kept.sum(axis=1))
 
     def min(self):
         return self.keep_count
@@ -40,6 +221,11 @@ class Roll(list):
     def max(self):
         return self.k * self.keep_count
 
+    def distribution(self) -> Distribution:
+        """Exact distribution of this roll's value, shared by every roll of the same normalized string."""
+        spec = self.spec
+        return roll_distribution(spec.n, spec.k, spec.keep, spec.keep_count)
+
     def __repr__(self):
         return "Roll('{}')".format(self.original_string)
 
@@ -47,11 +233,13 @@ class Roll(list):
         if self.n == 1:
             return str(self.value())
 
-        # WARNING: This is predicated on the roll being sorted increasingly.
+        # WARNING: This is predicated on the display being sorted increasingly, whatever sort_by the dice were kept in.
+        ordered = sorted(self)
         kept_start, kept_end = self._get_kept_range()
-        bottom_dropped_dice = wrap_in_parens_if_not_empty(_join_to_string(self, 0, kept_start), pad_after=" ")
-        kept_dice = _join_to_string(self, kept_start, kept_end)
-        top_dropped_dice = wrap_in_parens_if_not_empty(_join_to_string(self, kept_end, len(self)), pad_before=" ")
+        bottom_dropped_dice = wrap_in_parens_if_not_empty(_join_to_string(ordered, 0, kept_start), pad_after=" ")
+        kept_dice = _join_to_string(ordered, kept_start, kept_end)
+        top_dropped_dice = wrap_in_parens_if_not_empty(_join_to_string(ordered, kept_end, len(ordered)),
+                                                       pad_before=" ")
 
         return "[{}{}{}] -> {}".format(
             bottom_dropped_dice,
@@ -60,86 +248,327 @@ class Roll(list):
             self.value())
 
     def _get_kept_range(self):
-        """Returns indices defining the range of dice kept.
+        """Returns indices defining the range of dice kept, once sorted.
         e.g., 4d6^3 -> [1, 4, 5, 6] will return the tuple (1, 4)"""
         start = 0 if self.keep != Keep.TOP else len(self) - self.keep_count
         end = len(self) if self.keep != Keep.BOTTOM else self.keep_count
         return start, end
 
     def value(self):
-        return sum(self[i] for i in range(*self._get_kept_range()))
-
-    def _validate(self):
-        if not 0 < self.keep_count <= self.n:
-            raise TypeError("Roll string '{}' would keep an invalid number of dice.".format(self.original_string))
-        if not 0 < self.n <= self.maximum_dice:
-            raise TypeError("Number of dice [{}] is not between 0 and maximum dice limit [{}]".format(
-                self.n, self.maximum_dice))
-        if not 0 < self.k <= self.maximum_die_size:
-            raise TypeError("Die size [{}] is not between 0 and maximum die size [{}]".format(
-                self.k, self.maximum_die_size))
+        if self._value is None:
+            self._value = self._sum_kept_dice()
+        return self._value
+
+    def _sum_kept_dice(self):
+        if self._face_counts is not None:
+            return sum(face * count for face, count in enumerate(self._face_counts, 1))
+
+        keep_count = self.keep_count
+        if self.keep == Keep.ALL or keep_count == len(self):
+            return sum(self)
+
+        top = self.keep == Keep.TOP
+        if self.k <= len(self):
+            # Counting sort over faces:  O(n + k)
+            face_counts = Counter(self)
+            faces = range(self.k, 0, -1) if top else range(1, self.k + 1)
+            total = 0
+            for face in faces:
+                taken = min(face_counts[face], keep_count)
+                total += taken * face
+                keep_count -= taken
+                if not keep_count:
+                    return total
+
+        if keep_count * self.heap_selection_ratio <= len(self):
+            return sum((heapq.nlargest if top else heapq.nsmallest)(keep_count, self))
+
+        ordered = sorted(self)
+        return sum(ordered[-keep_count:] if top else ordered[:keep_count])
+
+
+def _materializing(name, mutates=False):
+    """Wraps the list method name so that it first materializes the Roll and any Rolls it is given, since list's own
+    implementations read the underlying storage directly.  Methods that mutate the dice also clear the cached value."""
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._materialize()
+        for arg in args:
+            if isinstance(arg, Roll):
+                arg._materialize()
+        result = method(self, *args, **kwargs)
+        if mutates:
+            self._value = None
+        return result
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in ("__contains__", "__eq__", "__ne__", "__lt__", "__le__", "__gt__", "__ge__", "__add__", "__mul__",
+              "__rmul__", "copy", "count", "index", "reverse", "sort"):
+    setattr(Roll, _name, _materializing(_name))
+for _name in ("__iadd__", "__imul__", "__setitem__", "__delitem__", "append", "clear", "extend", "insert", "pop",
+              "remove"):
+    setattr(Roll, _name, _materializing(_name, mutates=True))
+del _name
 
 
 class Throw:
     """A collection of Rolls, i.e. (2d4 + 2d20v1 - 10)"""
     ACCEPTABLE_CHARS = r"0123456789vV^d+-*/ ()"
     maximum_predicates = 20
-
-    @classmethod
-    def _validate(cls, s: str):
-        illegal_chars = set(char for char in s if char.lower() not in cls.ACCEPTABLE_CHARS)
-        if illegal_chars:
-            raise TypeError(
-                "Unacceptable characters ('{}') found in Throw input string: '{}'".format(
-                    "".join(illegal_chars), s))
+    maximum_length = 500
+    # The expression parser recurses once per level of parentheses.
+    maximum_nesting = 50
+    # Upper bound on the number of dice held in memory at once by each simulation worker.
+    simulation_chunk_dice = 2 ** 20
 
     def __init__(self, s: str):
-        self._validate(s)
-
         self.original_string = s
-        self.rolls = []
-        self.format_string = ROLL_REGEX.sub(self._add_roll_to_list_and_replace_with_string_placeholder, s)
-        # This self.format_string replaces every Roll substring with r'{}',
-        #  so that the values may be injected before display
-        #  e.g., '{} + {} - {}'
+        self.spec = ThrowSpec.from_string(s)
+        self.rolls = [Roll(roll_string) for roll_string in self.spec.roll_strings]
+
+    @property
+    def format_string(self):
+        return self.spec.format_string
+
+    @property
+    def _tree(self):
+        return self.spec.tree
 
     def __repr__(self):
         return "<Throw({})>".format(self.original_string)
 
     def min(self):
-        # TODO: This doesn't take - or / into account
-        if '-' in self.original_string or '/' in self.original_string:
-            raise ArithmeticError("Throw.min does not take sensible things into account.")
-        return eval(self.format_string.format(*(roll.min() for roll in self.rolls)))
+        return throw_bounds(self.spec.normalized())[0]
 
     def max(self):
-        # TODO: This doesn't take - or / into account
-        if '-' in self.original_string or '/' in self.original_string:
-            raise ArithmeticError("Throw.max does not take sensible things into account.")
-        return eval(self.format_string.format(*(roll.max() for roll in self.rolls)))
+        return throw_bounds(self.spec.normalized())[1]
+
+    def distribution(self) -> Distribution:
+        """Exact distribution of this throw's value, shared by every throw of the same normalized string."""
+        return throw_distribution(self.spec.normalized())
+
+    def roll_many(self, count: int) -> ThrowBatch:
+        """Throws this expression count times at once, without affecting this instance's rolls.
+
+        Returns a ThrowBatch holding a RollBatch per roll and a vector of the throw's values."""
+        batches = [roll.roll_many(count) for roll in self.rolls]
+        slots = [batch.values for batch in batches]
+        if throw_magnitude(self.spec.normalized()) > INT64_MAXIMUM:
+            # Python integers cannot overflow, at the cost of evaluating element by element.
+            slots = [values.astype(object) for values in slots]
+        try:
+            with np.errstate(divide='raise'):
+                values = self._tree.evaluate(slots)
+        except (FloatingPointError, ZeroDivisionError):
+            raise ZeroDivisionError("Throw '{}' divided by zero in a batch roll.".format(self.original_string))
+        return ThrowBatch(batches, np.broadcast_to(values, (count,)))
+
+    def simulate(self, trials: int, workers: int = 1) -> Distribution:
+        """Throws this expression trials times and returns the empirical distribution of its values.
+
+        Trials are split across a pool of worker processes, each with its own stream spawned from the calling
+        thread's stream.  Workers roll in bounded batches and return histograms rather than samples, so memory
+        depends on the range of values rather than the number of trials."""
+        shard_size, remainder = divmod(trials, workers)
+        shards = [shard_size + (1 if i < remainder else 0) for i in range(workers)]
+        streams = get_stream().spawn(workers)
+        limits = Roll.maximum_dice, Roll.maximum_die_size, Throw.maximum_predicates
+        arguments = [(self.original_string, shard, stream.seed_sequence, limits)
+                     for shard, stream in zip(shards, streams) if shard]
+
+        if workers == 1:
+            histograms = [_simulate_shard(*a) for a in arguments]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                histograms = list(executor.map(_simulate_shard, *zip(*arguments)))
+
+        total = Counter()
+        for histogram in histograms:
+            total.update(histogram)
+        return Distribution(total, trials)
 
     def get_evaluated_string(self):
         return self.format_string.format(*(roll.value() for roll in self.rolls))
 
     def value(self):
-        return eval(self.get_evaluated_string())
+        return self._tree.evaluate([roll.value() for roll in self.rolls])
 
     def __str__(self):
         return "[{}] -> {} = {}".format(self.original_string, self.get_evaluated_string(), self.value())
 
-    def _add_roll_to_list_and_replace_with_string_placeholder(self, m):
-        roll = Roll(m.group())
-        self.rolls.append(roll)
-        if len(self.rolls) > self.maximum_predicates:
-            raise TypeError("Throw string '{}' has more predicates than the permitted maximum [{}]".format(
-                self.original_string, self.maximum_predicates))
-        return r'{}'
-
     def reroll(self):
         for r in self.rolls:
             r.reroll()
 
 
+class ThrowSpec(_ImmutableSpec):
+    """Parsed and validated form of a Throw string, shared between all Throws of the same string.
+
+    format_string replaces every Roll substring with r'{}', so that the values may be injected before display,
+    e.g., '{} + {} - {}'.  tree is the arithmetic expression over roll slots, numbered in order of appearance,
+    and roll_strings holds the matching roll substrings."""
+    __slots__ = ("original_string", "format_string", "roll_strings", "roll_specs", "tree")
+
+    def __init__(self, original_string, format_string, roll_strings, tree):
+        object.__setattr__(self, "original_string", original_string)
+        object.__setattr__(self, "format_string", format_string)
+        object.__setattr__(self, "roll_strings", roll_strings)
+        object.__setattr__(self, "roll_specs", tuple(_parse_roll_spec(r) for r in roll_strings))
+        object.__setattr__(self, "tree", tree)
+
+    def __repr__(self):
+        return "ThrowSpec('{}')".format(self.original_string)
+
+    def __reduce__(self):
+        return ThrowSpec.from_string, (self.original_string,)
+
+    def normalized(self) -> str:
+        """The original string with whitespace removed."""
+        return "".join(self.original_string.split())
+
+    @staticmethod
+    def from_string(s: str) -> "ThrowSpec":
+        """Parses s once per distinct string; the length, predicate and dice limits are checked every call."""
+        if len(s) > Throw.maximum_length:
+            raise TypeError("Throw input string of length {} exceeds the permitted maximum [{}]".format(
+                len(s), Throw.maximum_length))
+        spec = _parse_throw_spec(s)
+        if len(spec.roll_specs) > Throw.maximum_predicates:
+            raise TypeError("Throw string '{}' has more predicates than the permitted maximum [{}]".format(
+                s, Throw.maximum_predicates))
+        for roll_spec in spec.roll_specs:
+            roll_spec.check_limits()
+        return spec
+
+
+@lru_cache(maxsize=THROW_SPEC_CACHE_SIZE)
+def _parse_throw_spec(s: str) -> ThrowSpec:
+    tokens, roll_strings, format_string = tokenize_throw(s)
+    tree = ExpressionParser(tokens, s).parse()
+    return ThrowSpec(s, format_string, roll_strings, tree)
+
+
+_DIGITS = frozenset("0123456789")
+_OPERATORS = frozenset("+-*/()")
+
+
+def tokenize_throw(s: str):
+    """Validates and tokenizes a Throw string in a single pass.
+
+    Returns (tokens, roll_strings, format_string), where tokens are as ExpressionParser expects and roll_strings
+    holds each roll substring in order.  Over-long strings are rejected before anything is scanned, and the
+    predicate and nesting limits are enforced as soon as they are exceeded."""
+    if len(s) > Throw.maximum_length:
+        raise TypeError("Throw input string of length {} exceeds the permitted maximum [{}]".format(
+            len(s), Throw.maximum_length))
+
+    tokens = []
+    roll_strings = []
+    format_pieces = []
+    end_of_last_roll = 0
+    position = 0
+    depth = 0
+    length = len(s)
+    while position < length:
+        char = s[position]
+        if char == ' ':
+            position += 1
+            continue
+        if char in _OPERATORS:
+            if char == '(':
+                depth += 1
+                if depth > Throw.maximum_nesting:
+                    raise TypeError("Throw string '{}' nests parentheses deeper than the permitted maximum [{}]".format(
+                        s, Throw.maximum_nesting))
+            elif char == ')':
+                depth -= 1
+            tokens.append(('op', char))
+            position += 1
+            continue
+
+        start = position
+        while position < length and s[position] in _DIGITS:
+            position += 1
+        if position < length and s[position] in 'dD':
+            die_end = position + 1
+            while die_end < length and s[die_end] in _DIGITS:
+                die_end += 1
+            if die_end > position + 1:
+                # A roll:  (\d+)?[dD](\d+)(?:([v^])(\d+))?
+                position = die_end
+                if position + 1 < length and s[position] in 'v^' and s[position + 1] in _DIGITS:
+                    position += 2
+                    while position < length and s[position] in _DIGITS:
+                        position += 1
+                if len(roll_strings) == Throw.maximum_predicates:
+                    raise TypeError("Throw string '{}' has more predicates than the permitted maximum [{}]".format(
+                        s, Throw.maximum_predicates))
+                tokens.append(('roll', len(roll_strings)))
+                roll_strings.append(s[start:position])
+                format_pieces.append(s[end_of_last_roll:start])
+                format_pieces.append('{}')
+                end_of_last_roll = position
+                continue
+        if position > start:
+            tokens.append(('number', int(s[start:position])))
+            continue
+
+        if char.lower() not in Throw.ACCEPTABLE_CHARS:
+            raise TypeError("Unacceptable character ('{}') found in Throw input string: '{}'".format(char, s))
+        raise TypeError("Throw input string '{}' could not be parsed at position {}.".format(s, position))
+
+    format_pieces.append(s[end_of_last_roll:])
+    return tokens, tuple(roll_strings), "".join(format_pieces)
+
+
+@lru_cache(maxsize=THROW_DISTRIBUTION_CACHE_SIZE)
+def throw_distribution(normalized: str) -> Distribution:
+    """Exact distribution of a Throw string with whitespace removed.
+
+    Every roll in a throw occupies its own slot in the expression tree, so the subtrees of each operation are
+    independent and their distributions combine directly."""
+    spec = ThrowSpec.from_string(normalized)
+    slots = [roll_distribution(r.n, r.k, r.keep, r.keep_count) for r in spec.roll_specs]
+    return Distribution.coerce(spec.tree.evaluate(slots))
+
+
+@lru_cache(maxsize=THROW_BOUNDS_CACHE_SIZE)
+def throw_bounds(normalized: str):
+    """The tuple (minimum, maximum) of a Throw string with whitespace removed, by interval arithmetic.
+
+    Bounds are exact unless a divisor may be zero but can never be -1 or 1, in which case they still contain
+    every possible value."""
+    spec = ThrowSpec.from_string(normalized)
+    return spec.tree.bounds([(r.keep_count, r.k * r.keep_count) for r in spec.roll_specs])
+
+
+@lru_cache(maxsize=THROW_BOUNDS_CACHE_SIZE)
+def throw_magnitude(normalized: str) -> int:
+    """The largest absolute value of a Throw string with whitespace removed, or of any expression within it."""
+    spec = ThrowSpec.from_string(normalized)
+    return largest_magnitude(spec.tree, [(r.keep_count, r.k * r.keep_count) for r in spec.roll_specs])
+
+
+def _simulate_shard(throw_string, trials, seed_sequence, limits):
+    """Worker body for Throw.simulate.  Returns a histogram of values as a Counter."""
+    Roll.maximum_dice, Roll.maximum_die_size, Throw.maximum_predicates = limits
+    histogram = Counter()
+    with use_stream(RandomStream(seed_sequence)):
+        throw = Throw(throw_string)
+        chunk_size = max(1, Throw.simulation_chunk_dice // max(1, sum(roll.n for roll in throw.rolls)))
+        while trials:
+            count = min(trials, chunk_size)
+            values, counts = np.unique(throw.roll_many(count).values, return_counts=True)
+            histogram.update(dict(zip(values.tolist(), counts.tolist())))
+            trials -= count
+    return histogram
+
+
 def _join_to_string(roll, start, end):
     return " ".join(map(str, (roll[i] for i in range(start, end))))
 
@@ -1,2 +1,5 @@
+from . import cache
+from . import library
+from . import resolver
 from . import table
 from . import table_entry
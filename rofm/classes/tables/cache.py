@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Persistent cache of parsed tables, keyed by a post's fullname and edit timestamp.
+
+A post that has not been edited since it was last parsed maps to the same key, so repeat summons in a popular
+thread skip parsing entirely.  Entries are pickled into a SQLite database and the least recently used entries are
+evicted once the total payload exceeds the configured size.  Keys carry SCHEMA_VERSION, and a payload that no
+longer unpickles is treated as a miss, so changes to the pickled classes never serve stale or broken tables."""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from ..util.configuration import Config, Section, Subsection
+
+_SIZE_SUFFIXES = {'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30}
+# Increment whenever the parsed classes that are pickled, e.g. the legacy Table and TableItem, change shape.
+SCHEMA_VERSION = 2
+
+
+class TableCache:
+    _default = None
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS parsed_tables ("
+                                     " key TEXT NOT NULL,"
+                                     " edited TEXT NOT NULL,"
+                                     " payload BLOB NOT NULL,"
+                                     " size INTEGER NOT NULL,"
+                                     " last_used REAL NOT NULL,"
+                                     " PRIMARY KEY (key, edited))")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS parsed_tables_lru ON parsed_tables (last_used)")
+
+    def __repr__(self):
+        return "<TableCache at '{}'>".format(self.path)
+
+    @classmethod
+    def default(cls):
+        """The cache described by the loaded configuration, or None if no [cache] section has been loaded."""
+        if cls._default is None and Section.cache in Config.config:
+            cache_config = Config.get(Section.cache)
+            directory = cache_config.get(Subsection.directory)
+            os.makedirs(directory, exist_ok=True)
+            cls._default = cls(os.path.join(directory, cache_config.get(Subsection.filename)),
+                               parse_size(cache_config.get(Subsection.max_filesize)))
+        return cls._default
+
+    def get(self, key: str, edited):
+        """Returns the cached tables, or None on a miss."""
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT payload FROM parsed_tables WHERE key = ? AND edited = ?",
+                                           (key, str(edited))).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE parsed_tables SET last_used = ? WHERE key = ? AND edited = ?",
+                                     (time.time(), key, str(edited)))
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            logging.debug("Discarding cached tables for {} that no longer unpickle: {}".format(key, e))
+            with self._lock, self._connection:
+                self._connection.execute("DELETE FROM parsed_tables WHERE key = ?", (key,))
+            return None
+
+    def put(self, key: str, edited, tables):
+        payload = pickle.dumps(tables, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._connection:
+            # Earlier revisions of an edited post are never looked up again.
+            self._connection.execute("DELETE FROM parsed_tables WHERE key = ?", (key,))
+            self._connection.execute("INSERT INTO parsed_tables VALUES (?, ?, ?, ?, ?)",
+                                     (key, str(edited), payload, len(payload), time.time()))
+            self._evict()
+
+    def _evict(self):
+        total, = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM parsed_tables").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._connection.execute("SELECT key, edited, size FROM parsed_tables ORDER BY last_used")
+        stale = []
+        for key, edited, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key, edited))
+            total -= size
+        self._connection.executemany("DELETE FROM parsed_tables WHERE key = ? AND edited = ?", stale)
+
+    def close(self):
+        self._connection.close()
+
+
+def parse_size(s: str) -> int:
+    """Converts sizes such as '64M' to a number of bytes."""
+    s = s.strip().upper()
+    if s and s[-1] in _SIZE_SUFFIXES:
+        return int(s[:-1]) * _SIZE_SUFFIXES[s[-1]]
+    return int(s)
+
+
+def cached_parse(post, parse, parser_name: str):
+    """Returns parse(), reusing a cached result for the same post revision when the default cache is available.
+
+    :param post: A PRAW Comment or Submission, or anything with fullname and edited attributes
+    :param parse: A no-argument callable producing the post's tables
+    :param parser_name: Distinguishes the results of different parsers for the same post"""
+    cache = TableCache.default()
+    if cache is None:
+        return parse()
+    try:
+        key = "{}:v{}:{}".format(parser_name, SCHEMA_VERSION, post.fullname), post.edited
+    except Exception as e:
+        logging.debug("Could not determine cache key for {}; parsing without cache: {}".format(post, e))
+        return parse()
+
+    tables = cache.get(*key)
+    if tables is None:
+        tables = parse()
+        cache.put(*key, tables)
+    return tables
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Compact binary libraries of tables, which are opened with mmap and rolled without deserializing any table.
+
+A library file is laid out as follows, every section starting on an 8 byte boundary and every number in the byte
+order recorded in the header:
+
+    header          magic, version, byte order, table count, outcome count, string count, section offsets
+    tables          per table: roll string id, header string id, index of its first outcome, outcome count
+    outcome lows    int64 per outcome, sorted within each table
+    outcome highs   int64 per outcome
+    outcome entries string id per outcome
+    weights below   float64 per outcome: probability that the table's roll is below the outcome's low
+    weights through float64 per outcome: probability that the table's roll is at most the outcome's high
+    string offsets  uint32 per string, plus one: string i is pool[offsets[i]:offsets[i + 1]]
+    string pool     UTF-8 text of every distinct roll string, header and entry
+
+The cumulative weights are computed from each roll's exact distribution when the library is written, so rolling a
+table is one uniform draw and a binary search over its weights, with no dice rolled."""
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+from .table import Table
+from ..rollers.rng import get_stream
+
+MAGIC = b"ROFMTLIB"
+VERSION = 1
+_HEADER = struct.Struct("=8sHHIIII8Q")
+_BYTE_ORDERS = {'little': 1, 'big': 2}
+
+
+class TableLibrary:
+    """A read-only view of a library file.  Only the tables that are used are ever touched in memory."""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        if len(view) < _HEADER.size:
+            raise ValueError("Table library is truncated.")
+        (magic, version, byte_order, table_count, outcome_count, string_count, _,
+         *offsets) = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("Not a table library.")
+        if version != VERSION:
+            raise ValueError("Unsupported table library version {}.".format(version))
+        if byte_order != _BYTE_ORDERS[sys.byteorder]:
+            raise ValueError("Table library was written with a different byte order.")
+
+        tables, lows, highs, entries, below, through, string_offsets, pool = offsets
+        self._tables = view[tables:tables + 16 * table_count].cast('I')
+        self._lows = view[lows:lows + 8 * outcome_count].cast('q')
+        self._highs = view[highs:highs + 8 * outcome_count].cast('q')
+        self._entries = view[entries:entries + 4 * outcome_count].cast('I')
+        self._below = view[below:below + 8 * outcome_count].cast('d')
+        self._through = view[through:through + 8 * outcome_count].cast('d')
+        self._string_offsets = view[string_offsets:string_offsets + 4 * (string_count + 1)].cast('I')
+        self._pool = view[pool:]
+        self._file = None
+
+    @classmethod
+    def open(cls, path: str) -> "TableLibrary":
+        f = open(path, 'rb')
+        try:
+            library = cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except Exception:
+            f.close()
+            raise
+        library._file = f
+        return library
+
+    def __repr__(self):
+        return "<TableLibrary of {} tables>".format(len(self))
+
+    def __len__(self):
+        return len(self._tables) // 4
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _string(self, string_id: int) -> str:
+        return str(self._pool[self._string_offsets[string_id]:self._string_offsets[string_id + 1]], 'utf-8')
+
+    def _outcome_range(self, index: int):
+        first, count = self._tables[4 * index + 2:4 * index + 4]
+        return first, first + count
+
+    def roll_string(self, index: int) -> str:
+        return self._string(self._tables[4 * index])
+
+    def header(self, index: int) -> str:
+        return self._string(self._tables[4 * index + 1])
+
+    def lookup(self, index: int, value: int):
+        """The entry of the given table covering value, or None if the value falls in a gap."""
+        first, end = self._outcome_range(index)
+        position = bisect_right(self._lows, value, first, end) - 1
+        if position >= first and value <= self._highs[position]:
+            return self._string(self._entries[position])
+        return None
+
+    def roll(self, index: int):
+        """Rolls the given table, returning the entry rolled or None if the roll fell in a gap."""
+        first, end = self._outcome_range(index)
+        u = get_stream().generator.random()
+        position = bisect_right(self._through, u, first, end)
+        if position < end and u >= self._below[position]:
+            return self._string(self._entries[position])
+        return None
+
+    def table(self, index: int) -> Table:
+        """Deserializes a single table."""
+        first, end = self._outcome_range(index)
+        return Table(self.roll_string(index), self.header(index),
+                     *(((self._lows[i], self._highs[i]), self._string(self._entries[i])) for i in range(first, end)))
+
+    def close(self):
+        for view in (self._tables, self._lows, self._highs, self._entries, self._below, self._through,
+                     self._string_offsets, self._pool):
+            view.release()
+        if self._file is not None:
+            self._buffer.close()
+            self._file.close()
+            self._file = None
+
+
+def write_library(path: str, tables):
+    """Writes the given Tables to a library file.  Entries must be strings."""
+    strings = {}
+
+    def string_id(s):
+        if not isinstance(s, str):
+            raise TypeError("Table library entries must be strings, not {}.".format(type(s).__name__))
+        return strings.setdefault(s, len(strings))
+
+    table_records = array('I')
+    lows, highs, entries = array('q'), array('q'), array('I')
+    below, through = array('d'), array('d')
+    for table in tables:
+        distribution = table.roll.distribution()
+        table_records.extend((string_id(table.roll.original_string), string_id(table.header),
+                              len(lows), len(table.outcomes)))
+        for low, high, entry in table.outcomes:
+            lows.append(low)
+            highs.append(high)
+            entries.append(string_id(entry))
+            below.append(float(distribution.cdf(low - 1)))
+            through.append(float(distribution.cdf(high)))
+
+    pool = bytearray()
+    string_offsets = array('I', [0])
+    for s in strings:
+        pool += s.encode('utf-8')
+        string_offsets.append(len(pool))
+
+    sections = [table_records.tobytes(), lows.tobytes(), highs.tobytes(), entries.tobytes(), below.tobytes(),
+                through.tobytes(), string_offsets.tobytes(), bytes(pool)]
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        position += -position % 8
+        offsets.append(position)
+        position += len(section)
+
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, _BYTE_ORDERS[sys.byteorder], len(table_records) // 4, len(lows),
+                             len(strings), 0, *offsets))
+        for offset, section in zip(offsets, sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(section)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Rolls tables together with the tables their outcomes link to.
+
+Links are followed from an explicit stack rather than by recursion, so a long or cyclic chain of generator tables
+costs at most maximum_depth levels and work_budget rolls and lookups, whatever its shape."""
+import logging
+from collections import namedtuple
+from string import punctuation, whitespace
+
+from .table_entry import TableEntry, parse_table_entry
+
+_trash = punctuation + whitespace
+
+# One rolled table: how many links were followed to reach it, the link that named it (None for a table rolled
+#  directly), the table itself, the value rolled and the entry that value selected (None in a gap).
+LinkedRoll = namedtuple("LinkedRoll", ["depth", "link", "table", "value", "entry"])
+
+
+class LinkResolver:
+    """Request-scoped: tables found for each link are cached, and each link is followed at most once."""
+    maximum_depth = 5
+    work_budget = 100
+
+    def __init__(self, find_tables):
+        """:param find_tables: Callable returning the list of Tables a link refers to; it may fetch them."""
+        self.find_tables = find_tables
+        self.work = 0
+        self.problems = []
+        self._tables_by_link = {}
+        self._visited = set()
+
+    @classmethod
+    def for_tables(cls, tables):
+        """A resolver whose links refer, case-insensitively, to the headers of the given tables."""
+        tables_by_header = {}
+        for table in tables:
+            tables_by_header.setdefault(_normalize(table.header), []).append(table)
+        return cls(lambda link: tables_by_header.get(_normalize(link), []))
+
+    def __repr__(self):
+        return "<LinkResolver; {} links cached, {} of {} work spent>".format(
+            len(self._tables_by_link), self.work, self.work_budget)
+
+    def _spend(self):
+        if self.work >= self.work_budget:
+            return False
+        self.work += 1
+        return True
+
+    def tables_for(self, link: str) -> list:
+        key = _normalize(link)
+        if key not in self._tables_by_link:
+            if not self._spend():
+                self.problems.append("Work budget exhausted before looking up [[{}]]".format(link))
+                return []
+            try:
+                self._tables_by_link[key] = list(self.find_tables(link))
+            except Exception as e:
+                logging.debug("Could not find tables for link [[{}]]: {}".format(link, e))
+                self._tables_by_link[key] = []
+            if not self._tables_by_link[key]:
+                self.problems.append("No table found for [[{}]]".format(link))
+        return self._tables_by_link[key]
+
+    def roll(self, *tables) -> list:
+        """Rolls each table and, depth first, every table linked from the entries rolled.
+
+        Returns a LinkedRoll per table rolled, in the order a reply would present them.  Links that are not followed,
+        because they were already followed, are too deep, or exceed the work budget, are described in problems."""
+        rolls = []
+        stack = [(0, None, table) for table in reversed(tables)]
+        while stack:
+            depth, link, table = stack.pop()
+            if not self._spend():
+                self.problems.append("Work budget exhausted; {} table(s) left unrolled".format(len(stack) + 1))
+                break
+            table.roll.reroll()
+            value = table.roll.value()
+            entry = table.lookup(value)
+            rolls.append(LinkedRoll(depth, link, table, value, entry))
+            if entry is None:
+                continue
+
+            linked = []
+            for child_link in (entry if isinstance(entry, TableEntry) else parse_table_entry(entry)).table_links:
+                if depth + 1 > self.maximum_depth:
+                    self.problems.append("[[{}]] is more than {} links deep".format(child_link, self.maximum_depth))
+                elif _normalize(child_link) in self._visited:
+                    self.problems.append("[[{}]] was already rolled".format(child_link))
+                else:
+                    self._visited.add(_normalize(child_link))
+                    linked.extend((depth + 1, child_link, t) for t in self.tables_for(child_link))
+            stack.extend(reversed(linked))
+        return rolls
+
+
+def _normalize(header: str) -> str:
+    return header.strip(_trash).lower()
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
+import logging
 import re
+from bisect import bisect_right
 from string import punctuation, whitespace
 from typing import Union, Tuple
 
@@ -7,25 +9,75 @@ from ..rollers.roll import Roll, Throw, STARTS_WITH_ROLL_REGEX
 
 _trash = punctuation + whitespace
 _line_regex = "^(\d+)(\s*-+\s*\d+)?(.*)"
+# An inline table item: the enumeration at the start of _line_regex, then every following character up to the
+#  next digit, which begins the next item.
+_inline_item_regex = re.compile(r"(\d+)(\s*-+\s*\d+)?(\D*)")
 
 
 class Table:
+    # Tables whose outcomes span at most this many values are looked up in a list indexed by value.
+    dense_index_limit = 1024
+
     def __init__(self, roll: Union[str, Roll, Throw], header: str,
-                 *outcomes: Union[Tuple[int, str]]):
+                 *outcomes: Union[Tuple[int, str], Tuple[Tuple[int, int], str]]):
         """:param roll: Dice generation method by which outcomes are selected
         :param header: Title of the table
-        :param outcomes: List of tuples"""
+        :param outcomes: List of tuples (value, entry) or ((low, high), entry) for outcomes covering a range"""
         self.roll = roll if isinstance(roll, Roll) or isinstance(roll, Throw) else Throw(roll)
         self.header = header
-        self.outcomes = list(outcomes)
-        self.outcomes.sort()
+        self.outcomes = sorted((_as_range(value) + (entry,) for value, entry in outcomes), key=lambda o: o[:2])
+
+        self._validate()
+        self._starts = [low for low, _, _ in self.outcomes]
+        self._dense_offset, self._dense = self._build_dense_index()
 
     def __str__(self):
         return "Table({}, '{}', {})".format(self.roll.original_string, self.header, self.outcomes)
 
     def get_outcome(self):
-        value = self.roll.value()
-        return self.outcomes[value - 1]
+        return self.lookup(self.roll.value())
+
+    def lookup(self, value):
+        """Returns the outcome entry covering the given value, or None if the value falls in a gap."""
+        if self._dense is not None:
+            index = value - self._dense_offset
+            return self._dense[index] if 0 <= index < len(self._dense) else None
+        index = bisect_right(self._starts, value) - 1
+        if index >= 0:
+            _, high, entry = self.outcomes[index]
+            if value <= high:
+                return entry
+        return None
+
+    def _validate(self):
+        minimum, maximum = self.roll.min(), self.roll.max()
+        previous_high = None
+        for low, high, entry in self.outcomes:
+            if low > high:
+                raise ValueError("Table '{}' has an outcome with an empty range [{}, {}]".format(
+                    self.header, low, high))
+            if previous_high is not None and low <= previous_high:
+                raise ValueError("Table '{}' has overlapping outcomes at {}".format(self.header, low))
+            if low < minimum or high > maximum:
+                raise ValueError("Table '{}' has an outcome [{}, {}] outside of its roll's range [{}, {}]".format(
+                    self.header, low, high, minimum, maximum))
+            previous_high = high
+
+    def _build_dense_index(self):
+        if not self.outcomes:
+            return 0, []
+        offset = self.outcomes[0][0]
+        span = self.outcomes[-1][1] - offset + 1
+        if span > self.dense_index_limit:
+            return offset, None
+        dense = [None] * span
+        for low, high, entry in self.outcomes:
+            dense[low - offset:high - offset + 1] = [entry] * (high - low + 1)
+        return offset, dense
+
+
+def _as_range(value):
+    return (value, value) if isinstance(value, int) else tuple(value)
 
 
 def parse_enumerated_table(text):
@@ -37,14 +89,72 @@ def parse_enumerated_table(text):
     roll_string = leading_header_roll.group(0)
     roll = Roll(roll_string)
     header = header_line.strip(_trash)[leading_header_roll.span()[1]:]
-    outcomes = [l for l in lines if re.search(_line_regex, l.strip(_trash))]
+
+    outcomes = []
+    for line in lines:
+        match = re.search(_line_regex, line.strip(_trash))
+        if match:
+            low = int(match.group(1))
+            high = int(match.group(2).strip(_trash)) if match.group(2) else low
+            outcomes.append(((low, high), match.group(3).strip(_trash)))
+
+    # Reddit's markup lets a list be enumerated "1." on every line, in which case only the widths are meaningful.
+    if any(low <= previous_high for ((_, previous_high), _), ((low, _), _) in zip(outcomes, outcomes[1:])):
+        outcomes = _enumerate_sequentially(outcomes, roll.min())
+
     table = Table(roll, header, *outcomes)
     return table
 
 
+def _enumerate_sequentially(outcomes, start):
+    renumbered = []
+    for (low, high), entry in outcomes:
+        renumbered.append(((start, start + high - low), entry))
+        start += high - low + 1
+    return renumbered
+
+
+def parse_tables(text):
+    """Returns every enumerated table found in text, in order.  Blocks that fail to parse are skipped."""
+    lines = text.split('\n')
+    starts = [i for i, line in enumerate(lines) if STARTS_WITH_ROLL_REGEX.match(line.strip(_trash))]
+    tables = []
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        try:
+            tables.append(parse_enumerated_table("\n".join(lines[start:end])))
+        except (TypeError, ValueError) as e:
+            logging.debug("Skipping table that failed to parse: {}".format(e))
+    return tables
+
+
+def scan_inline_items(text: str, start: int = 0, end: int = None):
+    """Iterates over a match for each item of an inline table in text[start:end], such as '1 a 2-3 b'.
+
+    Each match's groups are the item's first value, its range (e.g. '-3') if any, and its unstripped outcome.  The
+    text is walked once by finditer and nothing is sliced, so callers copy only what they keep."""
+    return _inline_item_regex.finditer(text, start, len(text) if end is None else end)
+
+
 def parse_inline_table(tight_inline_text):
-    """:param tight_inline_text: A line *beginning* with the roll indicator"""
-    # Match roll and advance
-    # Match any "header" before enumeration begins
-    # Match items
-    return None
+    """:param tight_inline_text: A line *beginning* with the roll indicator, e.g. 'd4 Weather: 1 Sunny 2-4 Rain'"""
+    text = tight_inline_text.strip(_trash)
+    leading_roll = STARTS_WITH_ROLL_REGEX.match(text)
+    if not leading_roll:
+        raise ValueError("Inline table '{}' does not begin with a roll".format(tight_inline_text))
+    roll = Roll(leading_roll.group(0))
+
+    outcomes = []
+    header_end = len(text)
+    for match in scan_inline_items(text, leading_roll.end()):
+        if not outcomes:
+            header_end = match.start()
+        first, span, outcome = match.groups()
+        low = int(first)
+        high = int(span.strip(_trash)) if span else low
+        outcomes.append(((low, high), outcome.strip(_trash)))
+    header = text[leading_roll.end():header_end].strip(_trash)
+
+    if any(low <= previous_high for ((_, previous_high), _), ((low, _), _) in zip(outcomes, outcomes[1:])):
+        outcomes = _enumerate_sequentially(outcomes, roll.min())
+
+    return Table(roll, header, *outcomes)
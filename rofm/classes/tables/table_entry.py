@@ -1,4 +1,8 @@
 #!/usr/bin/env python3
+import re
+
+# A reference to another table by its header, e.g. "Roll the [[special table]]!"
+_link_regex = re.compile(r"\[\[(.+?)\]\]")
 
 
 class TableEntry:
@@ -7,6 +11,10 @@ class TableEntry:
         self.content = content
         self.table_links = list(links)
 
+    def __repr__(self):
+        return "TableEntry({!r}{})".format(self.content, "".join(", {!r}".format(l) for l in self.table_links))
+
 
 def parse_table_entry(text):
-    pass
+    """Builds a TableEntry whose links are the [[header]] references in text, in order."""
+    return TableEntry(text, *(link.strip() for link in _link_regex.findall(text)))
@@ -60,6 +60,8 @@ class Section(str, Enum):
     dice = "dice"
     links = "links"
     attempts = "attempts"
+    cache = "cache"
+    journal = "journal"
 
 
 # noinspection SpellCheckingInspection
@@ -101,6 +103,11 @@ class Subsection(str, Enum):
     max_compound_roll_length = "max_compound_roll_length"
     # links
     max_depth = "max_depth"
+    work_budget = "work_budget"
+    # cache
+    directory = "directory"
+    # journal
+    batch_size = "batch_size"
 
 
 def get_version_and_updated():
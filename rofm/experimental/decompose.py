@@ -1,24 +1,117 @@
 #!/usr/bin/env python3
+import re
 from string import punctuation, whitespace
 
-from rofm.classes import STARTS_WITH_ROLL_REGEX
+from rofm.classes.rollers.roll import RollSpec, STARTS_WITH_ROLL_REGEX
+
+_trash = punctuation + whitespace
+# Longer numbers are not enumerations, and would make int() slow on adversarial posts.
+_enumerated_regex = re.compile(r"(\d{1,9})(?!\d)(?:\s*-+\s*(\d{1,9})(?!\d))?")
+_bulleted_regex = re.compile(r"\s*[-*+]\s")
+
+
+class DetectedTable:
+    """A line beginning with a die roll, and the enumerated or bulleted lines that follow it."""
+
+    def __init__(self, line_number: int, roll_string: str, header: str):
+        self.line_number = line_number
+        self.roll_string = roll_string
+        self.header = header
+        self.last_line_number = line_number
+        self.items = 0
+        self.weight = 0
+        self.problems = []
+        try:
+            spec = RollSpec.from_string(roll_string)
+            self.size = spec.keep_count * (spec.k - 1) + 1
+        except (TypeError, ValueError) as e:
+            self.size = None
+            self.problems.append(str(e))
+        self._previous_high = None
+
+    def __repr__(self):
+        return "<DetectedTable '{}' at line {}{}>".format(
+            self.roll_string, self.line_number, "" if self.is_confirmed() else "; " + "; ".join(self.problems))
+
+    def is_confirmed(self):
+        """True if the items' weights add up to the number of outcomes of the roll, with nothing amiss."""
+        return not self.problems
+
+    def add_enumerated(self, line_number: int, low: int, high: int):
+        previous_high = self._previous_high
+        if previous_high is not None:
+            if low <= previous_high:
+                self.problems.append("Line {} repeats {}".format(
+                    line_number, low if low == min(high, previous_high) else "{}-{}".format(
+                        low, min(high, previous_high))))
+            elif low > previous_high + 1:
+                self.problems.append("Missing {} before line {}".format(
+                    previous_high + 1 if low == previous_high + 2 else "{}-{}".format(previous_high + 1, low - 1),
+                    line_number))
+        if high < low:
+            self.problems.append("Line {} has the empty range {}-{}".format(line_number, low, high))
+        else:
+            self.weight += high - low + 1
+        self._previous_high = high if previous_high is None else max(high, previous_high)
+        self._add(line_number)
+
+    def add_bulleted(self, line_number: int):
+        self.weight += 1
+        self._add(line_number)
+
+    def _add(self, line_number):
+        self.items += 1
+        self.last_line_number = line_number
+
+    def finish(self):
+        if not self.items:
+            self.problems.append("No enumerated or bulleted lines follow the roll")
+        elif self.size is not None and self.weight != self.size:
+            self.problems.append("Weights add up to {} but {} has {} outcomes".format(
+                self.weight, self.roll_string, self.size))
+        return self
 
 
 def text_to_tables(raw_text):
-    # Steps:
-    # - Identify any line that has a roll in it?
-    # - See if the lines that follow are enumerated or bulletted.
-    # - If they are, and if the weights sum the correct amount, build the table.
-    # - If there are rolls that don't appear to have a table to chase them... Report that?
-
-    lines = raw_text.split('\n')
-    lines_that_start_with_die_rolls = [i for i, l in enumerate(lines)
-                                       if STARTS_WITH_ROLL_REGEX.match(l.lstrip(punctuation + whitespace))]
-    pass
+    """Finds every line that starts with a die roll and checks the enumerated or bulleted lines that follow it,
+    in a single pass over the text.
+
+    A table ends at the next roll, at a horizontal rule or at any other line that is neither blank nor an item.
+    Returns a DetectedTable for each roll; those that are not confirmed describe their problems."""
+    tables = []
+    current = None
+    for line_number, line in enumerate(raw_text.split('\n')):
+        stripped = line.lstrip(_trash)
+        roll_match = STARTS_WITH_ROLL_REGEX.match(stripped)
+        if roll_match:
+            if current is not None:
+                tables.append(current.finish())
+            current = DetectedTable(line_number, roll_match.group(0), stripped[roll_match.end():].strip(_trash))
+            continue
+        if current is None:
+            continue
+
+        # Bullets first, since stripping the marker may leave text that starts with a number, e.g. "- 5 gold"
+        enumerated_match = _enumerated_regex.match(stripped)
+        if _bulleted_regex.match(line) and stripped:
+            current.add_bulleted(line_number)
+        elif enumerated_match:
+            low = int(enumerated_match.group(1))
+            high = int(enumerated_match.group(2)) if enumerated_match.group(2) else low
+            current.add_enumerated(line_number, low, high)
+        elif line.strip():
+            # Prose, or a horizontal rule such as ---
+            tables.append(current.finish())
+            current = None
+    if current is not None:
+        tables.append(current.finish())
+    return tables
 
 
 def test():
-    text_to_tables(EXPLICIT)
+    for table in text_to_tables(EXPLICIT):
+        print(repr(table))
+
 
 EXPLICIT="""After producing a god, try writing a quick description like it was a writing prompt.
 The categories are interpretative;
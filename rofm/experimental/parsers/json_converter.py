@@ -1,10 +1,42 @@
 #!/usr/bin/env python3
-from rofm.classes import Table
+import json
+
+from rofm.classes.tables.table import Table
+from rofm.classes.tables.table_entry import TableEntry
+
+FORMAT = "rofm.table"
+VERSION = 1
 
 
 def table_to_json(table: Table):
-    pass
+    """Serializes a Table as a versioned JSON object, e.g.
+    {"format": "rofm.table", "version": 1, "roll": "d8", "header": "...", "outcomes": [[1, 2, "a God"], ...]}
+
+    Entries with links to other tables are written as {"content": ..., "links": [...]}."""
+    return json.dumps({"format": FORMAT,
+                       "version": VERSION,
+                       "roll": table.roll.original_string,
+                       "header": table.header,
+                       "outcomes": [[low, high, _entry_to_json(entry)] for low, high, entry in table.outcomes]})
 
 
 def json_to_table(json_string: str):
-    pass
+    data = json.loads(json_string)
+    if not isinstance(data, dict) or data.get("format") != FORMAT:
+        raise ValueError("JSON does not describe a table.")
+    if data.get("version") != VERSION:
+        raise ValueError("Unsupported table version {}.".format(data.get("version")))
+    return Table(data["roll"], data["header"],
+                 *(((low, high), _entry_from_json(entry)) for low, high, entry in data["outcomes"]))
+
+
+def _entry_to_json(entry):
+    if isinstance(entry, TableEntry):
+        return {"content": entry.content, "links": entry.table_links}
+    return entry
+
+
+def _entry_from_json(entry):
+    if isinstance(entry, dict):
+        return TableEntry(entry["content"], *entry["links"])
+    return entry
@@ -11,9 +11,12 @@
 # To add: Look for tables that are actual tables.
 # Look for keyword ROLL in tables and scan for arbitrary depth
 import logging
-import time
 
 from .models import Request
+from .render import ReplyRenderer
+from ..classes.core.bot import BotCore
+from ..classes.reddit.acknowledge import AcknowledgementBuffer
+from ..classes.reddit.batch import InfoBatcher
 from ..classes.reddit.endpoint import Reddit as FutureReddit
 from ..classes.util import configuration as future_configuration
 
@@ -28,20 +31,25 @@ def main(long_lived=True, config_file="config.ini"):
     try:
         logging.debug("Signing into Reddit.")
         sign_in_to_reddit()
-        while True:
-            process_mail()
-            if not long_lived:
-                logging.debug("Not run with --long-lived.  Exiting.")
-                return
-            logging.debug("Heartbeat.")
-            time.sleep(sleep_between_checks)
+        set_up_acknowledgements()
+        BotCore.maximum_attempts = int(future_configuration.Config.get(
+            future_configuration.Section.attempts, future_configuration.Subsection.per_user_mention))
+        bot = BotCore(FutureReddit.get_inbox_snapshot, answer_mention, handle_inbox, sleep_between_checks,
+                      abandon_mention=lambda mention: acknowledgements().acknowledge(mention),
+                      prepare_mentions=prefetch_mentions)
+        bot.every(sleep_between_checks, lambda: logging.debug("Heartbeat."))
+        try:
+            bot.run(long_lived)
+        finally:
+            acknowledgements().flush()
+        logging.debug("Not run with --long-lived.  Exiting.")
     except Exception as e:
         logging.debug("Top level.  Allowing to die for cron to revive.")
         logging.debug("Error: {}".format(e))
         raise e
 
 
-def decline_private_messages():
+def decline_private_messages(inbox):
     apology = "I'm sorry.  PM parsing is currently borked."
     apology += "  But look!  I'm alive again.  So that's promising, after all this time."
     apology += "  Maybe PMs will get some love soon."
@@ -49,41 +57,97 @@ def decline_private_messages():
     apology += "  Here's to hoping."
     reply_text = apology + "\n\n" + beep_boop()
 
-    private_messages = FutureReddit.get_private_messages()
+    private_messages = FutureReddit.get_private_messages(inbox)
     for pm in private_messages:
+        if acknowledgements().has_replied(pm):
+            acknowledgements().acknowledge(pm)
+            continue
         logging.info("Replying to {} with an apology declining to answer their PM.".format(pm.author))
-        pm.reply(reply_text)
-        FutureReddit.r.inbox.mark_read((pm,))
+        acknowledgements().replied(pm, pm.reply(reply_text))
+
+
+def handle_inbox(inbox):
+    """Declines the pass's private messages, then marks read everything answered since the last pass."""
+    decline_private_messages(inbox)
+    acknowledgements().flush()
+
+
+def acknowledgements() -> AcknowledgementBuffer:
+    """The buffer answered inbox items are marked read through, built by set_up_acknowledgements()."""
+    if acknowledgements.buffer is None:
+        raise RuntimeError("set_up_acknowledgements() must be called before mail is answered.")
+    return acknowledgements.buffer
+
+
+def set_up_acknowledgements():
+    """Builds the acknowledgement buffer from the configuration.  Call before any thread may answer mail, so that
+    every answer queues into the same buffer."""
+    if acknowledgements.buffer is None:
+        acknowledgements.buffer = AcknowledgementBuffer.default()
+    return acknowledgements.buffer
+
+
+acknowledgements.buffer = None
+
+
+def prefetch_mentions(mentions):
+    """Fetches every post the mentions to be answered link to, in as few calls as possible.  Returns the
+    InfoBatcher holding them, to be passed to answer_mention with each mention."""
+    batcher = InfoBatcher(FutureReddit.r)
+    for mention in mentions:
+        if not acknowledgements().has_replied(mention):
+            Request.prefetch(mention, batcher)
+    batcher.flush()
+    return batcher
 
 
 def process_mail():
-    decline_private_messages()
-    my_mail = FutureReddit.get_mentions()
-    to_process = [Request(x, FutureReddit.r) for x in my_mail]
-    for item in to_process:
-        if item.is_summons() or item.is_private_message():
-            reply_text = item.roll()
-            okay = True
-            if not reply_text:
-                reply_text = ("I'm sorry, but I can't find anything"
-                              " that I know how to parse.\n\n")
-                okay = False
-            reply_text += beep_boop()
-            if len(reply_text) > 10000:
-                addition = ("\n\n**This reply would exceed 10000 characters"
-                            " and has been shortened.  Chaining replies is an"
-                            " intended future feature.")
-                clip_point = 10000 - len(addition) - len(beep_boop()) - 200
-                reply_text = reply_text[:clip_point] + addition + beep_boop()
-            pass
-            item.reply(reply_text)
-            logging.debug("{} resolving request: {}.".format(
-                "Successfully" if okay else "Questionably", item))
-            if not okay:
-                logging.error("Something bad happened in the 'not okay' block, but I don't log anymore.")
-        else:
-            logging.error("Mail was not summons or error, but I still don't log.  Marking as read anyway.")
-        FutureReddit.r.inbox.mark_read((item.origin,))
+    """Answers everything in the inbox in a single, blocking pass."""
+    set_up_acknowledgements()
+    inbox = FutureReddit.get_inbox_snapshot()
+    decline_private_messages(inbox)
+    mentions = FutureReddit.get_mentions(inbox)
+    batcher = prefetch_mentions(mentions)
+    for mention in mentions:
+        answer_mention(mention, batcher)
+    acknowledgements().flush()
+
+
+def answer_mention(mention, batcher: InfoBatcher = None):
+    if acknowledgements().has_replied(mention):
+        logging.debug("Already answered {}; marking it read.".format(mention.fullname))
+        acknowledgements().acknowledge(mention)
+        return
+    item = Request(mention, FutureReddit.r, batcher)
+    if item.is_summons() or item.is_private_message():
+        renderer = item.render(ReplyRenderer(beep_boop()))
+        okay = True
+        if renderer.is_empty():
+            renderer.write("I'm sorry, but I can't find anything"
+                           " that I know how to parse.\n\n")
+            okay = False
+        posted = []
+
+        def record(reply):
+            posted.append(reply)
+            acknowledgements().record(item.origin, reply)
+
+        try:
+            item.reply_in_chain(renderer.finish(), record)
+        except Exception:
+            # Once any of the chain is live the mention counts as answered; answering again would duplicate it.
+            if not posted:
+                raise
+            logging.exception("Only part of the reply to {} could be posted.".format(item))
+            okay = False
+        acknowledgements().acknowledge(item.origin)
+        logging.debug("{} resolving request: {}.".format(
+            "Successfully" if okay else "Questionably", item))
+        if not okay:
+            logging.error("Something bad happened in the 'not okay' block, but I don't log anymore.")
+    else:
+        logging.error("Mail was not summons or error, but I still don't log.  Marking as read anyway.")
+        acknowledgements().acknowledge(item.origin)
 
 
 def beep_boop():
@@ -112,9 +176,8 @@ def mail_util():
     else, returns tuple (reddit_handle, list_of_all_mail, None)
     """
     sign_in_to_reddit()
-    all_mail = FutureReddit.get_unread()
-    mentions = FutureReddit.get_mentions()
-    return all_mail, mentions
+    inbox = FutureReddit.get_inbox_snapshot()
+    return inbox.unread, inbox.mentions
 
 
 ####################
@@ -1,19 +1,48 @@
 import logging
-import random
 import re
 import string
-
+import sys
+import time
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+from itertools import accumulate, chain, islice
+
+import numpy as np
 from praw.exceptions import PRAWException
-from praw.models import Comment, Submission, Message
+from praw.models import Comment, Submission, Message, MoreComments
 
+from ..classes.reddit.batch import InfoBatcher
 from ..classes.reddit.endpoint import Reddit as FutureReddit
+from ..classes.rollers.rng import get_stream
+from ..classes.tables.cache import cached_parse
+from ..classes.tables.table import scan_inline_items
+from .render import ReplyRenderer
 
 _header_regex = "^(\d+)?[dD](\d+)(.*)"
 _line_regex = "^(\d+)(\s*-+\s*\d+)?(.*)"
 _summons_regex = "u/roll_one_for_me"
+_summons_pattern = re.compile(_summons_regex)
+# Bounded so that int() never sees more digits than it will convert; larger counts are clamped to maximum_times anyway.
+_times_regex = re.compile(r"\[\[\s*(\d{1,3})\s*times?\s*\]\]", re.IGNORECASE)
+_markdown_link_pattern = re.compile("\\[(.*?)\\]\\s*\\((.*?)\\)")
 
 _trash = string.punctuation + string.whitespace
 
+# _line_regex, skipping leading trash itself so that lines need not be stripped first.
+_line_pattern = re.compile("[{}]*".format(re.escape(_trash)) + _line_regex[1:])
+_inline_die_pattern = re.compile("[dD]\\d+")
+_inline_top_pattern = re.compile("[dD](\\d+)")
+# _header_regex or else _line_regex at the start of any line, after leading trash other than line breaks.
+#  Trailing trash is stripped from the captured text instead, since a lazy group followed by [trash]* backtracks.
+_lexer_pattern = re.compile("^[{}]*(?:(\\d+)?[dD](\\d+)(.*)|(\\d+)([^\\S\\n]*-+[^\\S\\n]*\\d+)?(.*))".format(
+    re.escape(_trash.replace("\n", ""))), re.MULTILINE)
+
+HEADER, ITEM, INLINE_TABLE = "header", "item", "inline table"
+# offset is the position in the text at which the event's line begins.
+#  header values: (die, header); item values: (first, range, outcome); inline table values: (position in outcome,)
+LexerEvent = namedtuple("LexerEvent", ["kind", "line_number", "offset", "end", "values"])
+
 
 class TableSource:
     def __init__(self, praw_ref, descriptor):
@@ -27,37 +56,51 @@ class TableSource:
         return "<TableSource from {}>".format(self.desc)
 
     def roll(self):
-        instance = [T.roll() for T in self.tables]
-        # Prune failed rolls
-        instance = [x for x in instance if x]
-        if instance:
-            ret = "From {}...\n\n".format(self.desc)
-            for item in instance:
-                ret += item.unpack()
-            return ret
-        return None
+        renderer = ReplyRenderer(maximum_length=sys.maxsize)
+        return renderer.finish()[0] if self.render(renderer) else None
+
+    def render(self, renderer, prefix=""):
+        """Rolls each table in turn, writing to renderer until it is full.  Returns True if anything was written.
+
+        :param prefix: Written before this source's first table, if any"""
+        prefix += "From {}...\n\n".format(self.desc)
+        wrote = False
+        for table in self.tables:
+            if renderer.is_full():
+                break
+            table_roll = table.roll()
+            # Prune failed rolls
+            if table_roll and renderer.write(table_roll.unpack() if wrote else prefix + table_roll.unpack()):
+                wrote = True
+        return wrote
+
+    def roll_many(self, count):
+        """Rolls every table count times, sampling each table's rolls in one batch.
+
+        Returns count lists of TableRolls, one list per result, with failed rolls pruned."""
+        batches = [table.roll_many(count) for table in self.tables]
+        return [[table_roll for table_roll in result if table_roll] for result in zip(*batches)]
+
+    def render_many(self, renderer, count, prefix=""):
+        """Writes count results to renderer, each a roll of every table, until it is full.
+        Returns True if anything was written."""
+        prefix += "From {}...\n\n".format(self.desc)
+        wrote = False
+        for i, result in enumerate(self.roll_many(count), 1):
+            if renderer.is_full():
+                break
+            if not result:
+                continue
+            block = "".join(["**Result {} of {}**\n\n".format(i, count)] + [r.unpack() for r in result])
+            if renderer.write(block if wrote else prefix + block):
+                wrote = True
+        return wrote
 
     def has_tables(self):
         return 0 < len(self.tables)
 
     def _parse(self):
-        indices = []
-        text = get_post_text(self.source)
-        lines = text.split("\n")
-        for line_num in range(len(lines)):
-            l = lines[line_num]
-            if re.search(_header_regex, l.strip(_trash)):
-                indices.append(line_num)
-        # TODO: if no headers found?
-        if len(indices) == 0:
-            return None
-
-        table_text = []
-        for i in range(len(indices) - 1):
-            table_text.append("\n".join(lines[indices[i]:indices[i + 1]]))
-        table_text.append("\n".join(lines[indices[-1]:]))
-
-        self.tables = [Table(t) for t in table_text]
+        self.tables = cached_parse(self.source, lambda: parse_tables(get_post_text(self.source)), "legacy")
 
 
 class Table:
@@ -70,12 +113,33 @@ class Table:
         self.header = ""
         self.outcomes = []
         self.is_inline = False
+        self.cumulative_weights = []
 
         self._parse()
+        self._index_weights()
+
+    @classmethod
+    def from_lexed(cls, text, die, header, outcomes):
+        """Builds a Table from a lexed block without parsing its text again."""
+        table = cls.__new__(cls)
+        table.text = text
+        table.die = die
+        table.header = header
+        table.outcomes = outcomes
+        table.is_inline = False
+        table._index_weights()
+        return table
 
     def __repr__(self):
         return "<Table with header: {}>".format(self.text.split('\n')[0])
 
+    def _index_weights(self):
+        """Precomputes the running total of item weights, so that each roll is a binary search."""
+        self.cumulative_weights = list(accumulate(i.weight for i in self.outcomes))
+        total_weight = self.cumulative_weights[-1] if self.cumulative_weights else 0
+        if self.die != total_weight:
+            self.header = "[Table roll error: parsed die did not match sum of item weights.]  \n" + self.header
+
     def _parse(self):
         lines = self.text.split('\n')
         head = lines.pop(0)
@@ -83,22 +147,30 @@ class Table:
         if head_match:
             self.die = int(head_match.group(2))
             self.header = head_match.group(3)
-        self.outcomes = [TableItem(l) for l in lines if re.search(_line_regex, l.strip(_trash))]
+        self.outcomes = [TableItem(l) for l in lines if _line_pattern.match(l)]
 
     def roll(self):
         try:
-            weights = [i.weight for i in self.outcomes]
-            total_weight = sum(weights)
-            if self.die != total_weight:
-                self.header = "[Table roll error: parsed die did not match sum of item weights.]  \n" + self.header
-            # stops = [ sum(weights[:i+1]) for i in range(len(weights))]
-            c = random.randint(1, self.die)
-            scan = c
-            ind = -1
-            while scan > 0:
-                ind += 1
-                scan -= weights[ind]
+            c = get_stream().randint(1, self.die)
+        except Exception as e:
+            logging.debug("Exception in Table roll ({}): {}".format(self, e))
+            return None
+        # The first item whose running total reaches c
+        return self._table_roll(c, bisect_left(self.cumulative_weights, c))
 
+    def roll_many(self, count):
+        """count independent rolls at once, each a TableRoll, or None where roll() would have failed."""
+        try:
+            draws = get_stream().generator.integers(1, self.die, size=count, endpoint=True)
+        except Exception as e:
+            logging.debug("Exception in Table roll_many ({}): {}".format(self, e))
+            return [None] * count
+        # As in roll(), with every binary search done at once
+        indices = np.searchsorted(self.cumulative_weights, draws, side='left')
+        return [self._table_roll(c, ind) for c, ind in zip(draws.tolist(), indices.tolist())]
+
+    def _table_roll(self, c, ind):
+        try:
             table_roll = TableRoll(d=self.die,
                                    rolled=c,
                                    head=self.header,
@@ -131,32 +203,46 @@ class TableItem:
     def __repr__(self):
         return "<TableItem: {}{}>".format(self.outcome, "; has inline table" if self.inline_table else "")
 
+    @classmethod
+    def from_lexed(cls, text, first, span, outcome, inline_position=None):
+        """Builds a TableItem from the values of a lexed item line, and its inline table position if any."""
+        item = cls.__new__(cls)
+        item.text = text
+        item.inline_table = None
+        item.outcome = ""
+        item.weight = 0
+        item._interpret(first, span, outcome, inline_position)
+        return item
+
     def _parse(self):
-        main_regex = re.search(_line_regex, self.text.strip(_trash))
+        main_regex = _line_pattern.match(self.text)
         if not main_regex:
             return
-        # Grab outcome
-        self.outcome = main_regex.group(3).strip(_trash)
+        outcome = main_regex.group(3).strip(_trash)
+        die_regex = _inline_die_pattern.search(outcome)
+        self._interpret(main_regex.group(1), main_regex.group(2), outcome, die_regex.start() if die_regex else None)
+
+    def _interpret(self, first, span, outcome, inline_position):
+        self.outcome = outcome
         # Get weight / ranges
-        if not main_regex.group(2):
+        if not span:
             self.weight = 1
         else:
             try:
-                start = int(main_regex.group(1).strip(_trash))
-                stop = int(main_regex.group(2).strip(_trash))
+                start = int(first.strip(_trash))
+                stop = int(span.strip(_trash))
                 self.weight = stop - start + 1
             except:
                 self.weight = 1
         # Identify if there is a sub-table
-        if re.search("[dD]\d+", self.outcome):
-            die_regex = re.search("[dD]\d+", self.outcome)
+        if inline_position is not None:
             try:
-                self.inline_table = InlineTable(self.outcome[die_regex.start():])
+                self.inline_table = InlineTable(self.outcome[inline_position:])
             except RuntimeError as e:
                 logging.debug("Error in inline_table parsing ; table item full text:")
                 logging.debug(self.text)
                 logging.debug(e)
-                self.outcome = self.outcome[:die_regex.start()].strip(_trash)
+                self.outcome = self.outcome[:inline_position].strip(_trash)
         # this might be redundant
         self.outcome = self.outcome.strip(_trash)
 
@@ -179,31 +265,28 @@ class InlineTable(Table):
         return "<d{} Inline table>".format(self.die)
 
     def _parse(self):
-        top = re.search("[dD](\d+)(.*)", self.text)
+        top = _inline_top_pattern.search(self.text)
         if not top:
             return
 
         self.die = int(top.group(1))
-        tail = top.group(2)
-        # sub_outs = []
-        while tail:
-            in_match = re.search(_line_regex, tail.strip(_trash))
-            if not in_match:
-                logging.debug("Could not complete parsing InlineTable; in_match did not catch.")
-                logging.debug("Returning blank roll area.")
-                self.outcomes = [TableItem("1-{}. N/A".format(self.die))]
-                return
-            this_out = in_match.group(3)
-            next_match = re.search(_line_regex[1:], this_out)
-            if next_match:
-                tail = this_out[next_match.start():]
-                this_out = this_out[:next_match.start()]
-            else:
-                tail = ""
-
-            t_i_text = in_match.group(1) + (in_match.group(2) if in_match.group(2) else "") + this_out
+        start = top.end()
+        end = self.text.find("\n", start)
+        end = len(self.text) if end < 0 else end
+        if start == end:
+            return
+        items = scan_inline_items(self.text, start, end)
+        first = next(items, None)
+        if first is None or self.text[start:first.start()].strip(_trash):
+            logging.debug("Could not complete parsing InlineTable; no enumeration follows the die.")
+            logging.debug("Returning blank roll area.")
+            self.outcomes = [TableItem("1-{}. N/A".format(self.die))]
+            return
+        for match in chain((first,), items):
+            # An outcome holds no digits, since every digit begins an item, so it has no inline table of its own
             try:
-                self.outcomes.append(TableItem(t_i_text))
+                self.outcomes.append(TableItem.from_lexed(match.group(0), match.group(1), match.group(2),
+                                                          match.group(3).strip(_trash)))
             except Exception:
                 logging.exception("Error building TableItem in inline table; item skipped.")
 
@@ -217,8 +300,8 @@ class TableRoll:
         self.sub = out.inline_table
         self.err = err
 
-        if self.sub:
-            self.sob_out = self.sub.roll()
+        # The subtable is rolled once, here; unpack() only reports it
+        self.sub_out = self.sub.roll() if self.sub else None
 
     def __repr__(self):
         return "<d{} TableRoll: {}>".format(self.d, self.head)
@@ -227,21 +310,33 @@ class TableRoll:
         self.err = e
 
     def unpack(self):
-        ret = "{}...    \n".format(self.head.strip(_trash))
-        ret += "(d{} -> {}) {}.    \n".format(self.d, self.rolled, self.out.outcome)
-        if self.sub:
-            ret += "Subtable: {}".format(self.sub.roll().unpack())
-        ret += "\n\n"
-        return ret
+        parts = ["{}...    \n".format(self.head.strip(_trash)),
+                 "(d{} -> {}) {}.    \n".format(self.d, self.rolled, self.out.outcome)]
+        if self.sub_out:
+            parts.append("Subtable: {}".format(self.sub_out.unpack()))
+        parts.append("\n\n")
+        return "".join(parts)
 
 
 # noinspection PyBroadException
 class Request:
-    def __init__(self, praw_ref, r):
+    # Most results a single [[N times]] request may ask for
+    maximum_times = 20
+    # Linked posts are fetched and parsed concurrently, on at most this many threads...
+    maximum_link_workers = 4
+    # ... and each is given this many seconds from when a thread starts on it, after which it is left out of the reply.
+    link_timeout = 30
+    # Most top-level comments folded behind "load more comments" that are fetched, i.e. a single info call's worth
+    maximum_folded_comments = 100
+
+    def __init__(self, praw_ref, r, batcher: InfoBatcher = None):
+        """:param batcher: Shared by the requests of a pass so that the posts they link to are fetched together"""
         self.origin = praw_ref
         self.reddit = r
+        self.batcher = batcher if batcher is not None else InfoBatcher(r)
         self.tables_sources = []
         self.outcome = None
+        self.times = 1
 
         self._parse()
 
@@ -264,9 +359,12 @@ class Request:
 
         """
         # Default behavior: OP and top-level comments, as applicable
+        times_match = _times_regex.search(self.origin.body)
+        if times_match:
+            self.times = max(1, min(int(times_match.group(1)), self.maximum_times))
 
         # print("Parsing Request...", file=sys.stderr)
-        if re.search("\[.*?\]\s*\(.*?\)", self.origin.body):
+        if _markdown_link_pattern.search(self.origin.body):
             # print("Adding links...", file=sys.stderr)
             self.get_link_sources()
         else:
@@ -280,27 +378,76 @@ class Request:
             self.tables_sources.append(t)
 
     def get_link_sources(self):
-        links = re.findall("\[.*?\]\s*\(.*?\)", self.origin.body)
-        # print("Link set:", file=sys.stderr)
-        # print("\n".join([str(l) for l in links]), file=sys.stderr)
-        for item in links:
-            desc, href = re.search("\[(.*?)\]\s*\((.*?)\)", item).groups()
-            href = href.strip()
-            if "reddit.com" in href.lower():
-                logging.debug("Fetching href: {}".format(href.lower()))
-                if "m.reddit" in href.lower():
-                    logging.debug("Removing mobile 'm.'")
-                    href = href.lower().replace("m.reddit", "reddit", 1)
-                if ".json" in href.lower():
-                    logging.debug("Pruning .json and anything beyond.")
-                    href = href[:href.find('.json')]
-                if 'www' not in href.lower():
-                    logging.debug("Injecting 'www.' to href")
-                    href = href[:href.find("reddit.com")] + 'www.' + href[href.find("reddit.com"):]
-                href = href.rstrip("/")
-                logging.debug("Processing href: {}".format(href))
-
-                self._maybe_add_source(FutureReddit.try_to_follow_link(href), desc)
+        """Adds a source for each distinct Reddit link in the request, in the order the links are given."""
+        links = OrderedDict()
+        for desc, href in _markdown_link_pattern.findall(self.origin.body):
+            href = normalize_link(href)
+            if href is not None and href not in links:
+                links[href] = desc
+        if not links:
+            return
+        for href in links:
+            self.batcher.request_link(href)
+        self.batcher.flush()
+
+        workers = min(len(links), self.maximum_link_workers)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        started = {}
+
+        def follow_link(href, desc):
+            started[href] = time.monotonic()
+            return self._follow_link(href, desc)
+
+        try:
+            futures = [(href, executor.submit(follow_link, href, desc)) for href, desc in links.items()]
+            for href, future in futures:
+                try:
+                    source = self._await_link(href, future, futures, started, workers)
+                except TimeoutError:
+                    logging.warning("Timed out fetching href: {}".format(href))
+                    continue
+                except Exception as e:
+                    logging.debug("Could not add source for href {}: {}".format(href, e))
+                    continue
+                if source.has_tables():
+                    self.tables_sources.append(source)
+        finally:
+            # Threads still fetching are abandoned rather than waited for.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _await_link(self, href, future, futures, started, workers):
+        """The source future yields, giving it link_timeout seconds from when a worker starts on it.  A link still
+        queued once every worker is held by a link that has run out of time would never start in time, so is cancelled.
+
+        :param started: When each link that has started began, by href"""
+        while True:
+            start = started.get(href)
+            if start is not None:
+                return future.result(timeout=max(0, start + self.link_timeout - time.monotonic()))
+            running = [(started[other], other_future) for other, other_future in futures
+                       if other in started and not other_future.done()]
+            now = time.monotonic()
+            deadlines = [other_start + self.link_timeout for other_start, _ in running
+                         if other_start + self.link_timeout > now]
+            if len(running) >= workers and not deadlines and future.cancel():
+                raise TimeoutError()
+            # Wakes when this link finishes, or a worker may have come free for it.
+            wait([future] + [other_future for _, other_future in running], return_when=FIRST_COMPLETED,
+                 timeout=min(deadlines, default=now + self.link_timeout) - now)
+
+    def _follow_link(self, href, desc):
+        logging.debug("Processing href: {}".format(href))
+        future = self.batcher.request_link(href)
+        post = future.result() if future is not None else None
+        return TableSource(post if post is not None else FutureReddit.try_to_follow_link(href), desc)
+
+    @staticmethod
+    def prefetch(origin, batcher: InfoBatcher):
+        """Asks batcher for each post a Request from origin will follow a link to, without flushing."""
+        for desc, href in _markdown_link_pattern.findall(origin.body):
+            href = normalize_link(href)
+            if href is not None:
+                batcher.request_link(href)
 
     def get_default_sources(self):
         """Default sources are OP and top-level comments"""
@@ -308,22 +455,60 @@ class Request:
             # Add OP
             self._maybe_add_source(self.origin.submission, "this thread's original post")
             # Add Top-level comments
-            top_level_comments = FutureReddit.r.submission(self.origin.submission).comments
+            submission = self.origin.submission
+            top_level_comments = [item for item in submission.comments if not isinstance(item, MoreComments)]
+            # Some top-level comments folded behind "load more comments" are fetched together rather than left out.
+            folded_ids = chain.from_iterable(item.children for item in submission.comments
+                                             if isinstance(item, MoreComments))
+            folded = [self.batcher.request("t1_" + child)
+                      for child in islice(folded_ids, self.maximum_folded_comments)]
+            self.batcher.flush()
+            top_level_comments.extend(comment for comment in (future.result() for future in folded)
+                                      if comment is not None and comment.parent_id == submission.fullname)
             for item in top_level_comments:
                 self._maybe_add_source(item, "[this]({}) comment by {}".format(item.permalink, item.author))
         except:
             logging.debug("Could not add default sources.  (PM without links?)")
 
     def roll(self):
-        instance = [TS.roll() for TS in self.tables_sources]
-        instance = [x for x in instance if x]
-        return "\n\n-----\n\n".join(instance)
+        renderer = ReplyRenderer(maximum_length=sys.maxsize)
+        self.render(renderer)
+        return renderer.finish()[0]
+
+    def render(self, renderer):
+        """Writes the roll of each table source to renderer, stopping once it is full."""
+        separator = ""
+        for source in self.tables_sources:
+            if renderer.is_full():
+                break
+            if self.times > 1:
+                wrote = source.render_many(renderer, self.times, separator)
+            else:
+                wrote = source.render(renderer, separator)
+            if wrote:
+                separator = "\n\n-----\n\n"
+        return renderer
 
     def reply(self, reply_text):
-        self.origin.reply(reply_text)
+        return self.origin.reply(reply_text)
+
+    def reply_in_chain(self, reply_texts, on_first_reply=None):
+        """Posts the first text as a reply to the request, and each following text as a reply to the one before.
+        Returns the first reply.
+
+        :param on_first_reply: Called with the first reply as soon as it is posted, before any continuation"""
+        parent = self.origin
+        first = None
+        for reply_text in reply_texts:
+            parent = parent.reply(reply_text)
+            if first is None:
+                first = parent
+                if on_first_reply:
+                    on_first_reply(first)
+        return first
 
     def is_summons(self):
-        return re.search(_summons_regex, get_post_text(self.origin).lower())
+        return _summons_pattern.search(get_post_text(self.origin).lower())
 
     def is_private_message(self):
         return isinstance(self.origin, Message)
@@ -343,24 +528,76 @@ class TableSourceFromText(TableSource):
 
         self._parse()
 
-    # This is nearly identical to TableSource._parse ; if this is ever
-    # used outside of testing, it behooves me to make a single
-    # unifying method
     def _parse(self):
-        indices = []
-        text = self.text
-        lines = text.split("\n")
-        for line_num in range(len(lines)):
-            l = lines[line_num]
-            if re.search(_header_regex, l.strip(_trash)):
-                indices.append(line_num)
-        if len(indices) == 0:
-            return None
-        table_text = []
-        for i in range(len(indices) - 1):
-            table_text.append("\n".join(lines[indices[i]:indices[i + 1]]))
-        table_text.append("\n".join(lines[indices[-1]:]))
-        self.tables = [Table(t) for t in table_text]
+        self.tables = parse_tables(self.text)
+
+
+def lex_tables(text):
+    """Yields a LexerEvent for each table header, table item and inline table in text, in a single pass.
+
+    A line is a header if it matches _header_regex once stripped of trash, and otherwise an item if it matches
+    _line_regex; an item whose outcome contains a die is followed by an inline table event.  Other lines are
+    skipped over by the regex engine without being sliced out of the text."""
+    line_number = 0
+    previous_offset = 0
+    for match in _lexer_pattern.finditer(text):
+        offset = match.start()
+        line_number += text.count("\n", previous_offset, offset)
+        previous_offset = offset
+        die, header, first, span, outcome = match.group(2, 3, 4, 5, 6)
+        if die:
+            yield LexerEvent(HEADER, line_number, offset, match.end(), (int(die), header.rstrip(_trash)))
+            continue
+        outcome = outcome.strip(_trash)
+        yield LexerEvent(ITEM, line_number, offset, match.end(), (first, span, outcome))
+        die_match = _inline_die_pattern.search(outcome)
+        if die_match:
+            yield LexerEvent(INLINE_TABLE, line_number, offset, match.end(), (die_match.start(),))
+
+
+def parse_tables(text):
+    """Builds the list of Tables in text from the events of lex_tables.  Lines before the first header are ignored."""
+    tables = []
+    header = None
+    items = []
+    pending_item = None
+    for event in lex_tables(text):
+        if pending_item is not None:
+            # An item line is complete once the next event shows whether it holds an inline table.
+            inline_values = event.values if event.kind == INLINE_TABLE else ()
+            items.append(TableItem.from_lexed(text[pending_item.offset:pending_item.end],
+                                              *pending_item.values, *inline_values))
+            pending_item = None
+        if event.kind == HEADER:
+            if header is not None:
+                tables.append(Table.from_lexed(text[header.offset:event.offset - 1], *header.values, items))
+            header = event
+            items = []
+        elif event.kind == ITEM and header is not None:
+            pending_item = event
+    if pending_item is not None:
+        items.append(TableItem.from_lexed(text[pending_item.offset:pending_item.end], *pending_item.values))
+    if header is not None:
+        tables.append(Table.from_lexed(text[header.offset:], *header.values, items))
+    return tables
+
+
+def normalize_link(href):
+    """Returns the canonical form of a link to Reddit, or None if href does not target Reddit."""
+    href = href.strip()
+    if "reddit.com" not in href.lower():
+        return None
+    logging.debug("Fetching href: {}".format(href.lower()))
+    if "m.reddit" in href.lower():
+        logging.debug("Removing mobile 'm.'")
+        href = href.lower().replace("m.reddit", "reddit", 1)
+    if ".json" in href.lower():
+        logging.debug("Pruning .json and anything beyond.")
+        href = href[:href.find('.json')]
+    if 'www' not in href.lower():
+        logging.debug("Injecting 'www.' to href")
+        href = href[:href.find("reddit.com")] + 'www.' + href[href.find("reddit.com"):]
+    return href.rstrip("/")
 
 
 def get_post_text(post):
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import io
+
+CONTINUED = "\n\n*(Continued in the reply below.)*"
+TRUNCATED = "\n\n**The rest of this reply would not fit in {} comments and has been left out.**"
+CLIPPED = "...\n\n"
+
+
+class ReplyRenderer:
+    """Collects reply text block by block, within Reddit's limit on the length of a comment.
+
+    A block that would not fit in the current comment starts a continuation comment.  Once the last permitted
+    comment is full, write() refuses further blocks so that callers can stop rolling tables nobody will see."""
+    maximum_length = 10000
+    maximum_comments = 5
+
+    def __init__(self, footer: str = "", maximum_length: int = None, maximum_comments: int = None):
+        self.footer = footer
+        if maximum_length is not None:
+            self.maximum_length = maximum_length
+        if maximum_comments is not None:
+            self.maximum_comments = maximum_comments
+        self.comments = []
+        self.truncated = False
+        self._buffer = io.StringIO()
+        self._length = 0
+        self._blocks = 0
+
+    def __repr__(self):
+        return "<ReplyRenderer: {} blocks in {} comments{}>".format(
+            self._blocks, len(self.comments) + 1, ", truncated" if self.truncated else "")
+
+    @property
+    def capacity(self):
+        """Characters available to blocks in each comment, after room for the footer and closing notices."""
+        notice = max(len(CONTINUED), len(TRUNCATED.format(self.maximum_comments)))
+        return self.maximum_length - len(self.footer) - notice
+
+    def is_empty(self):
+        return not self._blocks
+
+    def is_full(self):
+        return self.truncated
+
+    def write(self, block: str) -> bool:
+        """Appends block to the reply.  Returns False, writing nothing, once the reply is full."""
+        if self.truncated:
+            return False
+        capacity = self.capacity
+        if len(block) > capacity:
+            block = block[:capacity - len(CLIPPED)] + CLIPPED
+        if self._length + len(block) > capacity:
+            if len(self.comments) + 1 >= self.maximum_comments:
+                self.truncated = True
+                return False
+            self.comments.append(self._buffer.getvalue())
+            self._buffer = io.StringIO()
+            self._length = 0
+        self._buffer.write(block)
+        self._length += len(block)
+        self._blocks += 1
+        return True
+
+    def finish(self) -> list:
+        """The text of each comment, in order, each one to be posted as a reply to the one before."""
+        comments = [comment + CONTINUED for comment in self.comments]
+        last = self._buffer.getvalue()
+        if self.truncated:
+            last += TRUNCATED.format(self.maximum_comments)
+        return comments + [last + self.footer]
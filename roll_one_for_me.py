@@ -2,62 +2,47 @@
 
 import logging
 import logging.handlers
-import time
 
 from praw.models import Comment
 
+from rofm.classes.core.bot import BotCore
 from rofm.classes.reddit.endpoint import Reddit
+from rofm.classes.rollers.roll import Roll, Throw
+from rofm.classes.tables.resolver import LinkResolver
 from rofm.classes.util.configuration import Config, Section, Subsection
-from rofm.classes.util.decorators import static_vars, occasional
+from rofm.classes.util.decorators import static_vars
 
 
+@static_vars(poll_interval=5)
 def main(long_lived=True, config_file="config.ini"):
     Config(config_file)
+    update_static_variables()
     Reddit.login()
-    first_pass = True
-    while long_lived or first_pass:
-        logging.debug("Begin core loop.")
-        first_pass = False
+    bot = BotCore(Reddit.get_inbox_snapshot, answer_mention, answer_private_messages, main.poll_interval)
+    bot.every(heartbeat.interval, heartbeat)
+    bot.every(perform_sentinel_search.interval, perform_sentinel_search)
+    logging.debug("Begin core loop.")
+    bot.run(long_lived)
 
-        answer_username_mentions()
-        answer_private_messages()
-        perform_sentinel_search()
 
-        heartbeat()
-        sleep()
-
-
-@occasional(frequency=15)
+@static_vars(interval=75)
 def heartbeat():
     logging.debug("A heart is beating and all is well.")
     pass
 
 
-@static_vars(interval=5)
-def sleep():
-    logging.info("Sleeping for {} seconds.".format(sleep.interval))
-    time.sleep(sleep.interval)
-
-
-def answer_username_mentions():
-    mentions = Reddit.get_mentions()
-    logging.info("Username mentions in this pass: {}".format(len(mentions)))
-    for user_mention in mentions:
-        answer_mention(user_mention)
-
-
 def answer_mention(mention: Comment):
     context = Reddit.get_mention_context(mention)
     while context.stack:
         pass
 
 
-def answer_private_messages():
+def answer_private_messages(inbox):
     logging.info("PM functionality disabled.")
     pass
 
 
-@occasional(counter=-1, frequency=10)
+@static_vars(interval=50)
 def perform_sentinel_search():
     logging.info("Sentinel functionality disabled.")
     pass
@@ -66,10 +51,20 @@ def perform_sentinel_search():
 def update_static_variables():
     interim = Config.get(Section.interim)
     sentinel = Config.get(Section.sentinel)
+    dice = Config.get(Section.dice)
+    links = Config.get(Section.links)
+
+    # Heartbeat and sentinel frequencies are configured in polls; they now run on their own timers.
+    main.poll_interval = int(interim.get(Subsection.sleep_between_checks))
+    heartbeat.interval = main.poll_interval * int(interim.get(Subsection.passes_between_heartbeats))
+    perform_sentinel_search.interval = main.poll_interval * int(sentinel.get(Subsection.frequency))
+
+    Roll.maximum_dice = int(dice.get(Subsection.max_n))
+    Roll.maximum_die_size = int(dice.get(Subsection.max_k))
+    Throw.maximum_predicates = int(dice.get(Subsection.max_compound_roll_length))
 
-    sleep.interval = int(interim.get(Subsection.sleep_between_checks))
-    heartbeat.frequency = int(interim.get(Subsection.passes_between_heartbeats))
-    perform_sentinel_search.frequency = int(sentinel.get(Subsection.frequency))
+    LinkResolver.maximum_depth = int(links.get(Subsection.max_depth))
+    LinkResolver.work_budget = int(links.get(Subsection.work_budget))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import threading
+import time
+
+from rofm.classes.core.bot import BotCore
+from rofm.classes.reddit.acknowledge import AcknowledgementBuffer, ReplyJournal
+from rofm.classes.reddit.endpoint import InboxSnapshot
+
+
+class FakeMention:
+    def __init__(self, fullname, seconds):
+        self.fullname = fullname
+        self.seconds = seconds
+
+
+def slow_mention_does_not_delay_others_tst():
+    unread = [FakeMention("t1_slow", 1.0)] + [FakeMention("t1_{}".format(i), 0.05) for i in range(12)]
+    answered = []
+    lock = threading.Lock()
+    concurrent = [0, 0]
+
+    def get_inbox():
+        return InboxSnapshot(unread, unread, [])
+
+    def handle_mention(mention):
+        with lock:
+            concurrent[0] += 1
+            concurrent[1] = max(concurrent)
+        time.sleep(mention.seconds)
+        with lock:
+            concurrent[0] -= 1
+            answered.append((mention.fullname, time.monotonic()))
+
+    start = time.monotonic()
+    BotCore(get_inbox, handle_mention).run(long_lived=False)
+    finished = dict(answered)
+    assert len(answered) == len(unread), "Each mention is answered exactly once"
+    assert concurrent[1] <= BotCore.maximum_concurrent_mentions
+    assert max(t for name, t in answered if name != "t1_slow") - start < finished["t1_slow"] - start
+
+
+def polling_continues_during_slow_mentions_tst():
+    polls = []
+    answered = []
+
+    def get_inbox():
+        polls.append(time.monotonic())
+        pending = [] if answered else [FakeMention("t1_slow", 0.5)]
+        return InboxSnapshot(pending, pending, [])
+
+    bot = BotCore(get_inbox, lambda mention: time.sleep(mention.seconds) or answered.append(mention),
+                  poll_interval=0.02)
+    bot.every(0.3, bot.stop)
+    bot.run()
+    assert len(answered) == 1
+    assert len(polls) > 5, "Polls kept running while the slow mention was answered"
+
+
+def only_dispatched_mentions_are_prepared_tst():
+    prepared = []
+    answered = []
+    unread = [FakeMention("t1_{}".format(i), 0) for i in range(3)]
+
+    def prepare_mentions(mentions):
+        prepared.append([mention.fullname for mention in mentions])
+        return len(prepared)
+
+    def get_inbox():
+        # The answered mentions stay unread, as they would until their acknowledgements are flushed
+        if len(prepared) == 1:
+            unread.append(FakeMention("t1_new", 0))
+        return InboxSnapshot(unread, unread, [])
+
+    bot = BotCore(get_inbox, lambda mention, batch: answered.append((mention.fullname, batch)), poll_interval=0.05,
+                  prepare_mentions=prepare_mentions)
+    bot.every(0.2, bot.stop)
+    bot.run()
+    assert prepared == [["t1_0", "t1_1", "t1_2"], ["t1_new"]]
+    assert sorted(answered) == [("t1_0", 1), ("t1_1", 1), ("t1_2", 1), ("t1_new", 2)]
+
+
+def failing_mention_is_abandoned_tst():
+    attempts = []
+    abandoned = []
+
+    def handle_mention(mention):
+        attempts.append(mention)
+        raise ConnectionError("RATELIMIT")
+
+    failing = [FakeMention("t1_failing", 0)]
+    bot = BotCore(lambda: InboxSnapshot(failing, failing, []), handle_mention, poll_interval=0.01,
+                  abandon_mention=abandoned.append)
+    bot.every(0.3, bot.stop)
+    bot.run()
+    assert len(attempts) == BotCore.maximum_attempts and abandoned == failing
+
+
+def fatal_errors_stop_the_bot_tst():
+    polls = []
+
+    def broken_inbox():
+        polls.append(time.monotonic())
+        raise ConnectionError("Reddit is down")
+
+    try:
+        BotCore(broken_inbox, lambda mention: None, poll_interval=0.01).run()
+        assert False, "Repeated inbox failures should be raised from run()"
+    except ConnectionError:
+        assert len(polls) == BotCore.maximum_inbox_failures
+
+    unread = [FakeMention("t1_revoked", 0)]
+
+    def revoked(mention):
+        raise BotCore.fatal_errors[0](None, "invalid_grant", None)
+
+    try:
+        BotCore(lambda: InboxSnapshot(unread, unread, []), revoked, poll_interval=0.01).run()
+        assert False, "Authentication failures should be raised from run()"
+    except BotCore.fatal_errors:
+        pass
+
+
+def batched_acknowledgement_tst():
+    marked = []
+    failing = [False]
+
+    def mark_read(items):
+        if failing[0]:
+            raise ConnectionError("Reddit is down")
+        marked.append(list(items))
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = ReplyJournal(os.path.join(directory, "journal.sqlite"))
+        buffer = AcknowledgementBuffer(mark_read, journal, batch_size=10)
+        mentions = [FakeMention("t1_{}".format(i), 0) for i in range(25)]
+        for mention in mentions:
+            buffer.replied(mention)
+        assert [len(batch) for batch in marked] == [10, 10] and len(journal) == 5
+        assert buffer.has_replied(mentions[-1]) and not buffer.has_replied(mentions[0])
+
+        failing[0] = True
+        buffer.flush()
+        assert len(buffer) == 5 and len(journal) == 5, "Unacknowledged replies stay on record"
+        failing[0] = False
+        buffer.flush()
+        assert [len(batch) for batch in marked] == [10, 10, 5] and len(buffer) == 0 and len(journal) == 0
+        journal.close()
+
+
+if __name__ == '__main__':
+    slow_mention_does_not_delay_others_tst()
+    polling_continues_during_slow_mentions_tst()
+    only_dispatched_mentions_are_prepared_tst()
+    failing_mention_is_abandoned_tst()
+    fatal_errors_stop_the_bot_tst()
+    batched_acknowledgement_tst()
+    print("Passed.")
@@ -1,3 +1,8 @@
+import re
+from collections import Counter
+from itertools import product
+
+from rofm.classes.rollers.rng import seeded
 from rofm.classes.rollers.roll import Throw, Roll
 
 
@@ -21,6 +26,160 @@ def parser_tst4(n):
         print(Throw("4d6^3 + d20 - 10d4v7 * (1d3 - 1)"))
 
 
+def throw_evaluation_tst(n):
+    t = Throw("4d6^3 + d20 - 10d4v7 * (1d3 - 1) / 2")
+    for _ in range(n):
+        # Throw division is integer division; the displayed string uses '/'.
+        expected = eval(t.get_evaluated_string().replace("/", "//"))
+        assert t.value() == expected, "{!s} evaluated to {}, expected {}".format(t, t.value(), expected)
+        t.reroll()
+
+
+def brute_force_counts(n, k, kept):
+    counts = Counter()
+    for dice in product(range(1, k + 1), repeat=n):
+        counts[sum(kept(sorted(dice)))] += 1
+    return counts
+
+
+def distribution_tst():
+    cases = {"4d6^3": lambda dice: dice[1:],
+             "5d4v2": lambda dice: dice[:2],
+             "3d5": lambda dice: dice,
+             "6d3^1": lambda dice: dice[-1:],
+             "5d6v4": lambda dice: dice[:4],
+             "4d5^2": lambda dice: dice[2:]}
+    for roll_string, kept in cases.items():
+        roll = Roll(roll_string)
+        distribution = roll.distribution()
+        assert distribution.counts == brute_force_counts(roll.n, roll.k, kept), roll_string
+        assert distribution.total == roll.k ** roll.n, roll_string
+
+    throw = Throw("d4 - 2d3 * 3 / (d2 + 1)")
+    expected = Counter()
+    for a, b, c, d in product(range(1, 5), range(1, 4), range(1, 4), range(1, 3)):
+        expected[a - (b + c) * 3 // (d + 1)] += 1
+    assert throw.distribution().counts == expected
+    assert throw.distribution() is Throw("d4-2d3*3/(d2+1)").distribution(), "Expected memoized distribution"
+
+    wide = Roll("50d100^25").distribution()
+    assert wide.total == sum(wide.counts.values()) and (wide.min(), wide.max()) == (25, 2500)
+    for costly in (lambda: Roll("100d1000^50").distribution(), lambda: Throw("100d1000 * 100d1000").distribution()):
+        try:
+            costly()
+            assert False, "Distributions beyond the work limit are refused"
+        except TypeError:
+            pass
+
+
+def kept_value_tst(n):
+    # Exercises the counting, heap and sorting selection paths.
+    for roll_string in ("100d4^30", "100d1000v3", "100d1000^60", "10d4v7", "4d6^3"):
+        for _ in range(n):
+            roll = Roll(roll_string)
+            ordered = sorted(roll)
+            kept = ordered[-roll.keep_count:] if "^" in roll_string else ordered[:roll.keep_count]
+            assert roll.value() == sum(kept), "{!r} -> {!s}".format(roll, roll)
+
+    for _ in range(n):
+        roll = Roll("4d6^3", sort_by=lambda x: -x)
+        shown_dice, shown_value = str(roll)[1:].split("] -> ")
+        shown_kept = re.sub("\\([^)]*\\)", "", shown_dice).split()
+        assert sum(map(int, shown_kept)) == int(shown_value) == roll.value(), str(roll)
+
+        roll = Roll("4d6")
+        roll.value()
+        roll[0] = 100
+        assert roll.value() == sum(roll)
+        roll.append(7)
+        roll.pop(1)
+        roll += [2]
+        assert roll.value() == sum(roll)
+
+
+def count_sampled_roll_tst(n):
+    maximum_dice, Roll.maximum_dice = Roll.maximum_dice, 100000
+    try:
+        for _ in range(n):
+            roll = Roll("100000d6")
+            value = roll.value()
+            assert len(roll) == 100000
+            assert sum(roll) == value and roll == sorted(roll), "Materialized dice disagree with the sampled value"
+            assert 100000 <= value <= 600000
+        fresh = [Roll("5000d6") for _ in range(4)]
+        assert 6 in fresh[0] and fresh[1].count(6) and fresh[2].index(6) >= 0 and len(fresh[3].copy()) == 5000
+        unread, other = Roll("5000d6"), Roll("5000d6")
+        assert unread == sorted(unread) and unread != other and len([0] + other) == 5001, "Unread pools compare filled"
+    finally:
+        Roll.maximum_dice = maximum_dice
+    for lowered in (lambda: Roll("100000d6"), lambda: Throw("50000d6 + 1")):
+        try:
+            lowered()
+            assert False, "Parses cached under a higher limit must not bypass the lowered one"
+        except TypeError:
+            pass
+
+
+def bounds_tst():
+    for throw_string in ("4d6^3 + d20 - 10d4v7 * (1d3 - 1)", "-d6 * (d4 - 3)", "100 / d6 - d2", "(d6 - 7) / d3",
+                         "2d4v1 * -(d3 - 2) - 5", "d20 / (d3 - 2)"):
+        throw = Throw(throw_string)
+        try:
+            distribution = throw.distribution()
+        except ZeroDivisionError:
+            # d20 / (d3 - 2) may divide by zero; its bounds cover the divisor's nonzero values.
+            distribution = Throw("d20 / (2d2v1 * 2 - 3)").distribution()
+        assert (throw.min(), throw.max()) == (distribution.min(), distribution.max()), throw_string
+
+
+def roll_many_tst(n):
+    for roll_string, kept in (("4d6^3", slice(1, None)), ("10d4v7", slice(None, 7)), ("3d20", slice(None))):
+        batch = Roll(roll_string).roll_many(n)
+        assert batch.dice.shape == (n, Roll(roll_string).n)
+        for dice, value in zip(batch.dice.tolist(), batch.values.tolist()):
+            assert sum(sorted(dice)[kept]) == value, "{} rolled {} but valued {}".format(roll_string, dice, value)
+
+    throw = Throw("4d6^3 + d20 - 10d4v7 * (1d3 - 1)")
+    batch = throw.roll_many(n)
+    for i, value in enumerate(batch.values.tolist()):
+        a, b, c, d = (roll.values[i] for roll in batch.rolls)
+        assert a + b - c * (d - 1) == value
+
+    huge = Throw(" * ".join(["100d1000"] * 5))
+    batch = huge.roll_many(n)
+    for i, value in enumerate(batch.values.tolist()):
+        product_of_rolls = 1
+        for roll in batch.rolls:
+            product_of_rolls *= int(roll.values[i])
+        assert value == product_of_rolls and huge.min() <= value <= huge.max(), "Products beyond int64 must not wrap"
+
+
+def seeded_stream_tst(n):
+    def throw_some():
+        throw = Throw("4d6^3 + d20 - 10d4v7 * (1d3 - 1)")
+        values = []
+        for _ in range(n):
+            values.append(throw.value())
+            throw.reroll()
+        return values, throw.roll_many(n).values.tolist()
+
+    with seeded(20171125):
+        first = throw_some()
+    with seeded(20171125):
+        second = throw_some()
+    assert first == second, "Seeded streams should reproduce their rolls"
+
+
+def simulate_tst(n):
+    throw = Throw("4d6^3 + d20 - 10d4v7 * (1d3 - 1)")
+    exact = throw.distribution()
+    with seeded(n):
+        simulated = throw.simulate(1000 * n, workers=2)
+    assert simulated.total == 1000 * n
+    assert set(simulated.counts).issubset(exact.counts), "Simulation produced impossible values"
+    assert abs(simulated.mean() - exact.mean()) < 1, "Simulated mean is implausibly far from the exact mean"
+
+
 def rerolls_tst(n):
     r = Roll("3d20")
     for _ in range(n):
@@ -43,4 +202,12 @@ if __name__ == '__main__':
     parser_tst2(runs)
     parser_tst3(runs)
     parser_tst4(runs)
+    throw_evaluation_tst(runs)
+    distribution_tst()
+    kept_value_tst(runs)
+    bounds_tst()
+    count_sampled_roll_tst(runs)
+    roll_many_tst(runs)
+    seeded_stream_tst(runs)
+    simulate_tst(runs)
     rerolls_tst(runs)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+import random
+import re
+import time
+import timeit
+from collections import Counter
+from types import SimpleNamespace
+
+from rofm.classes.reddit.batch import InfoBatcher
+from rofm.experimental.decompose import EXPLICIT, text_to_tables
+from rofm.legacy.models import InlineTable, Request, Table, TableItem, TableSourceFromText, parse_tables, \
+    _header_regex, _line_regex, _trash
+from rofm.legacy.render import ReplyRenderer
+
+FUZZ_LINES = EXPLICIT.split("\n") + ["", "d", "2d", "!!d6!!", "  7 -- 9 ", "12", "3 - x", "\r", "1. roll d4: 1 a 2 b"]
+INLINE_FUZZ_ALPHABET = "0123456789" * 2 + "abc  -- .,:;d\n"
+
+
+class ReferenceTable(Table):
+    """The per-line strip and re.search that Table._parse used before parse_tables lexed posts, kept as a reference."""
+
+    def _parse(self):
+        lines = self.text.split('\n')
+        head = lines.pop(0)
+        head_match = re.search(_header_regex, head.strip(_trash))
+        if head_match:
+            self.die = int(head_match.group(2))
+            self.header = head_match.group(3)
+        self.outcomes = [TableItem(l) for l in lines if re.search(_line_regex, l.strip(_trash))]
+
+
+class ReferenceInlineTable(Table):
+    """The repeated search and tail slicing that InlineTable._parse used before scan_inline_items, as a reference."""
+
+    def _parse(self):
+        top = re.search("[dD](\\d+)(.*)", self.text)
+        if not top:
+            return
+        self.die = int(top.group(1))
+        tail = top.group(2)
+        while tail:
+            in_match = re.search(_line_regex, tail.strip(_trash))
+            if not in_match:
+                self.outcomes = [TableItem("1-{}. N/A".format(self.die))]
+                return
+            this_out = in_match.group(3)
+            next_match = re.search(_line_regex[1:], this_out)
+            if next_match:
+                tail = this_out[next_match.start():]
+                this_out = this_out[:next_match.start()]
+            else:
+                tail = ""
+            self.outcomes.append(TableItem(in_match.group(1) + (in_match.group(2) or "") + this_out))
+
+
+def reference_parse_tables(text):
+    indices = []
+    lines = text.split("\n")
+    for line_num in range(len(lines)):
+        if re.search(_header_regex, lines[line_num].strip(_trash)):
+            indices.append(line_num)
+    if len(indices) == 0:
+        return []
+    table_text = []
+    for i in range(len(indices) - 1):
+        table_text.append("\n".join(lines[indices[i]:indices[i + 1]]))
+    table_text.append("\n".join(lines[indices[-1]:]))
+    return [ReferenceTable(t) for t in table_text]
+
+
+def describe(tables):
+    return [(t.text, t.die, t.header, t.cumulative_weights,
+             [(i.text, i.outcome, i.weight, i.inline_table and i.inline_table.die) for i in t.outcomes])
+            for t in tables]
+
+
+def explicit_equivalence_tst():
+    assert describe(parse_tables(EXPLICIT)) == describe(reference_parse_tables(EXPLICIT))
+
+
+def text_to_tables_tst():
+    tables = text_to_tables(EXPLICIT)
+    problems = {table.roll_string: table.problems for table in tables if not table.is_confirmed()}
+    assert set(problems) == {"6d99", "d102"}, problems
+    assert problems["6d99"][0] == "Missing 43 before line 121"
+    assert problems["d102"] == ["Line 462 repeats 63", "Line 488 repeats 75"]
+    assert [t.roll_string for t in tables if t.is_confirmed()] == \
+        ["d8", "d3", "d3", "d12", "d12", "d12", "d12", "d20", "d10", "d8", "d20", "d8"]
+
+    loot, = text_to_tables("d4 Loot\n- 5 gold\n- 3 gems\n* a sword\n+ nothing")
+    assert loot.is_confirmed() and loot.items == 4, loot.problems
+    short, = text_to_tables("d4 Loot\n- 5 gold\n- 3 gems\n\nThe end")
+    assert short.problems == ["Weights add up to 2 but d4 has 4 outcomes"]
+
+
+def fuzz_equivalence_tst(n, seed=20171125):
+    generator = random.Random(seed)
+    for _ in range(n):
+        text = "\n".join(generator.choice(FUZZ_LINES) for _ in range(generator.randint(0, 30)))
+        assert describe(parse_tables(text)) == describe(reference_parse_tables(text)), \
+            "Parsers disagree on {!r}".format(text)
+
+
+def inline_fuzz_equivalence_tst(n, seed=20171125):
+    generator = random.Random(seed)
+    for _ in range(n):
+        text = "d" + "".join(generator.choice(INLINE_FUZZ_ALPHABET) for _ in range(generator.randint(0, 40)))
+        new, reference = InlineTable(text), ReferenceInlineTable(text)
+        assert (new.die, new.header, [(i.outcome, i.weight) for i in new.outcomes]) == \
+               (reference.die, reference.header, [(i.outcome, i.weight) for i in reference.outcomes]), \
+            "Inline parsers disagree on {!r}".format(text)
+
+
+def bounded_render_tst():
+    source = TableSourceFromText(scaled_explicit(50000), "EXPLICIT")
+    rolled = []
+    original_roll, Table.roll = Table.roll, lambda self: rolled.append(self) or original_roll(self)
+    try:
+        renderer = ReplyRenderer("\n\nfooter", maximum_length=2000, maximum_comments=3)
+        assert source.render(renderer) and renderer.is_full()
+    finally:
+        Table.roll = original_roll
+    comments = renderer.finish()
+    assert len(comments) == 3 and all(len(c) <= 2000 for c in comments) and comments[-1].endswith("footer")
+    assert len(rolled) < len(source.tables) // 10
+
+    nested = TableSourceFromText("d2 Outer\n1. Inner d2 1 left 2 right\n2. Inner d2 1 left 2 right", "")
+    table_roll = nested.tables[0].roll()
+    assert len({table_roll.unpack() for _ in range(50)}) == 1
+
+
+def roll_many_tst():
+    source = TableSourceFromText(EXPLICIT, "EXPLICIT")
+    results = source.roll_many(10)
+    assert len(results) == 10 and all(len(result) == len(source.tables) for result in results)
+
+    d8 = source.tables[0]
+    outcomes = Counter(table_roll.out.outcome for table_roll in d8.roll_many(8000))
+    assert set(outcomes) == {"a God", "a Goddess", "is not a god or goddess"}
+    assert 3400 < outcomes["is not a god or goddess"] < 4600
+
+    renderer = ReplyRenderer()
+    assert source.render_many(renderer, 3) and "**Result 3 of 3**" in renderer.finish()[0]
+
+
+class FakeReddit:
+    def __init__(self, titles):
+        self.titles = titles
+        self.calls = []
+
+    def info(self, fullnames):
+        self.calls.append(list(fullnames))
+        return (SimpleNamespace(fullname=name, title=self.titles[name]) for name in fullnames if name in self.titles)
+
+
+def concurrent_link_sources_tst():
+    def follow_link(self, href, desc):
+        title = self.batcher.request_link(href).result().title
+        time.sleep({"slow": 5, "fast": 0.2, "steady": 0.3, "lingering": 0.8}.get(title, 0))
+        if title == "broken":
+            raise ValueError("Could not follow {}".format(href))
+        return TableSourceFromText(EXPLICIT, title)
+
+    titles = {"t3_a1": "fast", "t3_a2": "slow", "t3_a3": "broken", "t3_a4": "quick", "t1_c9": "again"}
+    paths = ["a1/fast/", "a2/slow", "a3", "a4/quick/", "a5/again/c9"]
+    body = "".join("[link](https://m.reddit.com/r/rpg/comments/{}) ".format(path) for path in paths)
+    body += "[again](https://www.reddit.com/r/rpg/comments/a1/fast.json)"
+    reddit = FakeReddit(titles)
+    original = Request._follow_link, Request.link_timeout
+    Request._follow_link, Request.link_timeout = follow_link, 0.5
+    try:
+        start = time.monotonic()
+        request = Request(SimpleNamespace(body=body), reddit)
+        elapsed = time.monotonic() - start
+    finally:
+        Request._follow_link, Request.link_timeout = original
+    assert [source.desc for source in request.tables_sources] == ["fast", "quick", "again"]
+    assert elapsed < 2, "A slow link does not hold up the reply"
+    assert reddit.calls == [list(titles)], "Every link is fetched in one call"
+
+    # Each link's time is counted from when a worker starts on it, not from when the batch was submitted.
+    queued = FakeReddit({"t3_b1": "steady", "t3_b2": "lingering", "t3_b3": "steady"})
+    body = "".join("[link](https://www.reddit.com/r/rpg/comments/{}) ".format(path) for path in ("b1", "b2", "b3"))
+    original = Request._follow_link, Request.link_timeout, Request.maximum_link_workers
+    Request._follow_link, Request.link_timeout, Request.maximum_link_workers = follow_link, 0.5, 2
+    try:
+        request = Request(SimpleNamespace(body=body), queued)
+    finally:
+        Request._follow_link, Request.link_timeout, Request.maximum_link_workers = original
+    assert [source.desc for source in request.tables_sources] == ["steady", "steady"]
+
+    batcher = InfoBatcher(reddit)
+    futures = [batcher.request("t1_{}".format(i)) for i in range(250)]
+    batcher.flush()
+    assert [len(call) for call in reddit.calls[1:]] == [100, 100, 50] and all(f.result() is None for f in futures)
+
+
+def times_request_tst():
+    def times(body):
+        return Request(SimpleNamespace(body=body), FakeReddit({})).times
+
+    assert times("[[3 times]]") == 3
+    assert times("[[ 999 TIMES ]]") == Request.maximum_times
+    assert times("[[ {} times ]]".format("9" * 5000)) == 1, "An absurd count is ignored rather than raising"
+
+
+def partial_reply_chain_tst():
+    class FakeComment:
+        def __init__(self, depth=0):
+            self.depth = depth
+
+        def reply(self, text):
+            if self.depth:
+                raise ConnectionError("RATELIMIT")
+            return FakeComment(self.depth + 1)
+
+    request = Request.__new__(Request)
+    request.origin = FakeComment()
+    first_replies = []
+    try:
+        request.reply_in_chain(["first", "continued"], first_replies.append)
+        assert False, "The continuation should fail"
+    except ConnectionError:
+        pass
+    assert len(first_replies) == 1, "The first reply is reported before the chain continues"
+
+
+def scaled_explicit(line_count):
+    lines = EXPLICIT.split("\n")
+    return "\n".join((lines * (line_count // len(lines) + 1))[:line_count])
+
+
+def benchmark(line_counts=(5000, 50000), n=2000):
+    text = "d100 " + " ".join("{}. outcome number {}".format(i, chr(ord('a') + i % 26)) for i in range(1, 101))
+    for name, parser in (("reference", ReferenceInlineTable), ("InlineTable", InlineTable)):
+        seconds = timeit.timeit(lambda: parser(text), number=n)
+        print("{:>13}: {:8.1f} us to parse a one-line d100 inline table".format(name, 1e6 * seconds / n))
+
+    for line_count in line_counts:
+        text = scaled_explicit(line_count)
+        for name, parser in (("reference", reference_parse_tables), ("parse_tables", parse_tables)):
+            seconds = min(timeit.repeat(lambda: parser(text), number=1, repeat=3))
+            print("{:>13}: {:8.1f} ms to parse {} lines of EXPLICIT".format(name, 1e3 * seconds, line_count))
+
+
+if __name__ == '__main__':
+    explicit_equivalence_tst()
+    text_to_tables_tst()
+    fuzz_equivalence_tst(5000)
+    inline_fuzz_equivalence_tst(20000)
+    bounded_render_tst()
+    roll_many_tst()
+    concurrent_link_sources_tst()
+    times_request_tst()
+    partial_reply_chain_tst()
+    print("Passed.")
+    benchmark()
@@ -1,4 +1,14 @@
-from rofm.classes.tables.table import parse_enumerated_table
+import os
+import tempfile
+import time
+import timeit
+from types import SimpleNamespace
+
+from rofm.classes.tables.cache import TableCache, cached_parse
+from rofm.classes.tables.library import TableLibrary, write_library
+from rofm.classes.tables.resolver import LinkResolver
+from rofm.classes.tables.table import Table, parse_enumerated_table, parse_inline_table
+from rofm.experimental.parsers.json_converter import json_to_table, table_to_json
 
 d3_table_text = """
 d3 This God is
@@ -9,6 +19,139 @@ d3 This God is
 
 3. Neutral"""
 
+d8_ranged_table_text = """
+d8 This God Is
+
+1-2. a God
+
+3-4. a Goddess
+
+5-8. is not a god or goddess"""
+
+d4_reddit_enumerated_table_text = """
+d4 Weather
+
+1. Sunny
+1. Rainy
+1. Two lines of fog
+1. Snow"""
+
+
+def ranged_lookup_tst():
+    t = parse_enumerated_table(d8_ranged_table_text)
+    assert [t.lookup(v) for v in range(1, 9)] == ["a God"] * 2 + ["a Goddess"] * 2 + ["is not a god or goddess"] * 4
+
+    t = parse_enumerated_table(d4_reddit_enumerated_table_text)
+    assert [t.lookup(v) for v in range(1, 5)] == ["Sunny", "Rainy", "Two lines of fog", "Snow"]
+
+    for dense_index_limit in (Table.dense_index_limit, 0):
+        Table.dense_index_limit, original_limit = dense_index_limit, Table.dense_index_limit
+        try:
+            t = Table("2d6", "Gappy", ((2, 4), "low"), (7, "seven"), ((10, 12), "high"))
+        finally:
+            Table.dense_index_limit = original_limit
+        assert [t.lookup(v) for v in range(1, 14)] == [None, "low", "low", "low", None, None, "seven", None, None,
+                                                      "high", "high", "high", None]
+        assert t.get_outcome() in (None, "low", "seven", "high")
+
+
+def inline_table_tst():
+    t = parse_inline_table("d6 Weather: 1-2. Sunny; 3 Rain, 4-6 Fog.")
+    assert t.header == "Weather"
+    assert [t.lookup(v) for v in range(1, 7)] == ["Sunny"] * 2 + ["Rain"] + ["Fog"] * 3
+
+    d100_text = "d100 " + " ".join("{}. outcome {}".format(i, chr(ord('a') + i % 26)) for i in range(1, 101))
+    t = parse_inline_table(d100_text)
+    assert t.lookup(100) == "outcome w"
+    n = 1000
+    seconds = timeit.timeit(lambda: parse_inline_table(d100_text), number=n)
+    print("{:.1f} us per one-line d100 inline table".format(1e6 * seconds / n))
+
+
+def serialization_tst():
+    tables = [parse_enumerated_table(d8_ranged_table_text),
+              Table("2d6", "Gappy", ((2, 4), "low"), (7, "seven"), ((10, 12), "high"))]
+    for t in tables:
+        assert str(json_to_table(table_to_json(t))) == str(t)
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "library")
+    try:
+        write_library(path, tables * 1000)
+        with TableLibrary.open(path) as library:
+            assert len(library) == 2000
+            assert (library.roll_string(1), library.header(1)) == ("2d6", "Gappy")
+            assert [library.lookup(1, v) for v in range(1, 14)] == [tables[1].lookup(v) for v in range(1, 14)]
+            assert str(library.table(1998)) == str(tables[0])
+            assert {library.roll(1999) for _ in range(200)} == {None, "low", "seven", "high"}
+    finally:
+        os.remove(path)
+        os.rmdir(directory)
+
+
+def link_resolution_tst():
+    chain = [Table("d1", "Step {}".format(i), (1, "Go to [[step {}]]".format(i + 1))) for i in range(2000)]
+    resolver = LinkResolver.for_tables(chain + [Table("d1", "Loop", (1, "Again, [[loop]]"))])
+    rolls = resolver.roll(chain[0])
+    assert [r.depth for r in rolls] == list(range(LinkResolver.maximum_depth + 1))
+    assert rolls[-1].link == "step {}".format(LinkResolver.maximum_depth)
+    assert len(resolver.problems) == 1
+
+    rolls = resolver.roll(resolver.tables_for("LOOP")[0])
+    assert len(rolls) == 2 and resolver.problems[-1] == "[[loop]] was already rolled"
+
+    fetches = []
+    resolver = LinkResolver(lambda link: fetches.append(link) or [chain[int(link.split()[1])]])
+    resolver.maximum_depth = len(chain)
+    resolver.work_budget = 50
+    rolls = resolver.roll(chain[0])
+    assert len(rolls) == len(fetches) == 25
+
+
+def table_cache_tst():
+    post = SimpleNamespace(fullname="t3_post", edited=False)
+    parses = []
+
+    def parse():
+        parses.append(post)
+        return ["parsed"]
+
+    assert TableCache.default() is None, "No [cache] section is loaded"
+    assert cached_parse(post, parse, "legacy") == cached_parse(post, parse, "legacy") and len(parses) == 2
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TableCache(os.path.join(directory, "cache.sqlite"), max_bytes=300)
+        for key in "ab":
+            cache.put(key, 1, key * 100)
+            time.sleep(0.01)
+        assert cache.get("a", 1) == "a" * 100
+        time.sleep(0.01)
+        cache.put("c", 1, "c" * 100)
+        assert cache.get("b", 1) is None and cache.get("a", 1) and cache.get("c", 1), "Least recently used is evicted"
+
+        cache.put("a", 2, "revised")
+        assert cache.get("a", 1) is None and cache.get("a", 2) == "revised"
+
+        with cache._connection:
+            cache._connection.execute("INSERT INTO parsed_tables VALUES ('d', '1', ?, 4, 0)", (b"junk",))
+        assert cache.get("d", 1) is None and cache.get("d", 1) is None, "Unreadable payloads are misses"
+
+        TableCache._default = cache
+        try:
+            parses.clear()
+            assert cached_parse(post, parse, "legacy") == cached_parse(post, parse, "legacy") == ["parsed"]
+            assert len(parses) == 1
+        finally:
+            TableCache._default = None
+            cache.close()
+
+
 if __name__ == '__main__':
     t = parse_enumerated_table(d3_table_text)
     print(t)
+    ranged_lookup_tst()
+    inline_table_tst()
+    serialization_tst()
+    link_resolution_tst()
+    table_cache_tst()
+    print("Passed.")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import random
+import re
+import timeit
+
+from rofm.classes.rollers.roll import ROLL_REGEX, ROLL_REGEX_STR, Throw, tokenize_throw
+
+# The character-set validation and regex substitution that tokenize_throw replaced, kept as a reference.
+REFERENCE_TOKEN_REGEX = re.compile(r"\s*(?:(?P<roll>{})|(?P<number>\d+)|(?P<op>[-+*/()]))".format(ROLL_REGEX_STR))
+FUZZ_ALPHABET = "0123456789" * 3 + "dDvV^+-*/ ()" * 2 + "x\t"
+
+
+def reference_tokenize(s):
+    if set(char for char in s if char.lower() not in Throw.ACCEPTABLE_CHARS):
+        raise TypeError()
+    tokens = []
+    roll_strings = []
+    position = 0
+    while position < len(s):
+        match = REFERENCE_TOKEN_REGEX.match(s, position)
+        if not match:
+            if s[position:].isspace():
+                break
+            raise TypeError()
+        if match.group('roll'):
+            tokens.append(('roll', len(roll_strings)))
+            roll_strings.append(match.group('roll'))
+            if len(roll_strings) > Throw.maximum_predicates:
+                raise TypeError()
+        elif match.group('number'):
+            tokens.append(('number', int(match.group('number'))))
+        else:
+            tokens.append(('op', match.group('op')))
+        position = match.end()
+    return tokens, tuple(roll_strings), ROLL_REGEX.sub(r'{}', s)
+
+
+def outcome(tokenizer, s):
+    try:
+        return tokenizer(s)
+    except TypeError:
+        return TypeError
+
+
+def fuzz_equivalence_tst(n, seed=20171125):
+    generator = random.Random(seed)
+    for _ in range(n):
+        s = "".join(generator.choice(FUZZ_ALPHABET) for _ in range(generator.randint(0, 40)))
+        assert outcome(tokenize_throw, s) == outcome(reference_tokenize, s), "Tokenizers disagree on {!r}".format(s)
+
+
+def rejects_oversized_input_tst():
+    for s in ("d6+" * Throw.maximum_predicates + "d6", "1" * (Throw.maximum_length + 1)):
+        assert outcome(tokenize_throw, s) is TypeError, "Expected {!r} to be rejected".format(s[:20])
+    deep = "(" * 249 + "1" + ")" * 249
+    assert len(deep) <= Throw.maximum_length and outcome(Throw, deep) is TypeError
+    nested = "(" * Throw.maximum_nesting + "d6" + ")" * Throw.maximum_nesting
+    assert 1 <= Throw(nested).value() <= 6
+    signs = "-" * (Throw.maximum_length - 3) + "d6"
+    assert -6 <= Throw(signs).value() <= -1 and Throw(signs).min() == -6
+    assert 1 <= Throw("-" + signs).value() <= 6
+
+
+def benchmark(n):
+    for s in ("d20", "4d6^3 + d20 - 10d4v7 * (1d3 - 1)", " + ".join(["10d10^5"] * Throw.maximum_predicates)):
+        for name, tokenizer in (("reference", reference_tokenize), ("tokenize_throw", tokenize_throw)):
+            seconds = timeit.timeit(lambda: tokenizer(s), number=n)
+            print("{:>15}: {:8.2f} us per parse of {!r}".format(name, 1e6 * seconds / n, s[:40]))
+
+
+if __name__ == '__main__':
+    fuzz_equivalence_tst(100000)
+    rejects_oversized_input_tst()
+    print("Passed.")
+    benchmark(20000)